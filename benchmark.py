@@ -0,0 +1,281 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import importlib
+import tracemalloc
+import numpy as np
+from shared import arithmetic
+from shared.groups import get_curve
+from shared.instrumentation import Instrument
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# protocol class, prover and verifier attribute of every variant
+VARIANTS = {
+    "schnorr": ("schnorr", "SchnorrIdentificationProtocol3", "honest_prover", "honest_verifier"),
+    "stateless_commitment": ("subverted_schnorr", "SchnorrIdentificationProtocol", "subverted_prover", "honest_verifier"),
+    "stateful_commitment": ("subverted_schnorr", "SchnorrIdentificationProtocol", "subverted_prover", "honest_verifier"),
+    "biased_challenge": ("subverted_schnorr", "SchnorrIdentificationProtocol", "honest_prover", "subverted_verifier"),
+}
+
+def bit_sizes():
+    with open(os.path.join(ROOT, "primes.json"), "r") as f:
+        data = json.load(f)
+    return sorted(int(key[len("bit_"):]) for key in data if key.startswith("bit_"))
+
+def use_variant(name):
+    # every variant directory has its own aes_prf, subverted_schnorr, ... modules with the same
+    # names, so the modules of the previous variant are dropped before importing the next one;
+    # the shared package at the root is imported once and used by all variants
+    directories = [os.path.join(ROOT, variant) for variant in VARIANTS]
+    for module_name, module in list(sys.modules.items()):
+        if os.path.dirname(getattr(module, "__file__", None) or "") in directories:
+            del sys.modules[module_name]
+
+    sys.path = [path for path in sys.path if os.path.abspath(path) not in directories]
+    sys.path.insert(0, os.path.join(ROOT, name))
+    return importlib.import_module(VARIANTS[name][0])
+
+def summarise(durations, total_time=None):
+    durations = np.array(durations, dtype=float)
+    total_time = durations.sum() if total_time is None else total_time
+    return {
+        "n": len(durations),
+        "mean": float(durations.mean()),
+        "p50": float(np.percentile(durations, 50)),
+        "p90": float(np.percentile(durations, 90)),
+        "p99": float(np.percentile(durations, 99)),
+        "throughput": len(durations) / total_time if total_time else None,
+    }
+
+def timed(function, *args):
+    start_time = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start_time
+
+def peak_memory(function, *args):
+    # peak traced allocation of one call, in a pass of its own since tracing slows the calls down
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def benchmark_variant(name, bits, rounds, repeats):
+    module = use_variant(name)
+    _, protocol_class, prover_name, verifier_name = VARIANTS[name]
+
+    os.environ["BIT_NUMBER"] = str(bits)
+    backdoor_key = os.urandom(32)
+    instrument = Instrument()
+    if name == "schnorr":
+        protocol = getattr(module, protocol_class)(instrument=instrument)
+    else:
+        protocol = getattr(module, protocol_class)(backdoor_key, instrument=instrument)
+    prover = getattr(protocol, prover_name)
+    verifier = getattr(protocol, verifier_name)
+
+    def commitment():
+        t = prover.prover_commitment()
+        # the stateless prover also returns the leaked bit position
+        return t[0] if name == "stateless_commitment" else t
+
+    def challenge(t):
+        return verifier.challenge(128, t) if name == "biased_challenge" else verifier.challenge(128)
+
+    # 1. the phases of a round, timed by the protocol's own instrument
+    phases = ("commitment", "challenge", "response", "validate")
+    transcripts = []
+    for _ in range(rounds):
+        t = commitment()
+        c = challenge(t)
+        z = prover.prover_response(c)
+        verifier.validate(t, z)
+        transcripts.append((t, c, z))
+
+    results = {}
+    for operation in phases:
+        results[operation] = summarise(np.array(instrument.durations[operation]) / 1e9)
+    instrument.enabled = False
+
+    memory_transcripts = []
+    def one_round():
+        t = commitment()
+        c = challenge(t)
+        z = prover.prover_response(c)
+        verifier.validate(t, z)
+        memory_transcripts.append((t, c, z))
+    round_memory = peak_memory(one_round)
+    for operation in phases:
+        results[operation]["peak_memory"] = round_memory
+
+    # 2. the backdoor PRF of the variant, on the commitments of the rounds
+    if name != "schnorr":
+        aes_prf = importlib.import_module("aes_prf").aes_prf
+        if name == "stateless_commitment":
+            prf = lambda t: aes_prf(backdoor_key, t, protocol.secret_key.bit_length(), protocol.group.prf_length)
+        elif name == "stateful_commitment":
+            # the stateful prover runs the PRF on its cached cipher
+            aes_prf_cached = importlib.import_module("aes_prf").aes_prf_cached
+            prf = lambda t: aes_prf_cached(backdoor_key, t, 1, protocol.group.prf_length)
+        else:
+            prf = lambda t: aes_prf(backdoor_key, t, 128 // 8, protocol.group.prf_length)
+
+        results["prf"] = summarise([timed(prf, t)[1] for t, c, z in transcripts])
+        results["prf"]["peak_memory"] = peak_memory(prf, transcripts[0][0])
+
+    # 3. key recovery on the transcripts of the rounds; the biased challenge adversary does not
+    # recover x from an honest prover's transcripts, it only predicts the backdoored challenges
+    if name in ("stateless_commitment", "stateful_commitment"):
+        adversary = importlib.import_module("adversary").Adversary(protocol, backdoor_key)
+        durations = [timed(adversary.obtain_secret, transcripts)[1] for _ in range(repeats)]
+        results["key_recovery"] = summarise(durations)
+        results["key_recovery"]["transcripts"] = len(transcripts)
+        results["key_recovery"]["peak_memory"] = peak_memory(adversary.obtain_secret, transcripts)
+    elif name == "biased_challenge":
+        adversary = importlib.import_module("adversary").Adversary(protocol, backdoor_key)
+        durations = [timed(adversary.subverted_rounds, transcripts)[1] for _ in range(repeats)]
+        results["prediction"] = summarise(durations)
+        results["prediction"]["transcripts"] = len(transcripts)
+        results["prediction"]["peak_memory"] = peak_memory(adversary.subverted_rounds, transcripts)
+
+    # 4. writing and reading back the transcripts of the rounds
+    if name == "stateless_commitment":
+        store = importlib.import_module("transcript_store")
+
+        def transcript_io():
+            with tempfile.TemporaryDirectory() as folder:
+                path = os.path.join(folder, "transcripts.bin")
+                with store.TranscriptWriter(path, protocol.group.byte_length) as writer:
+                    writer.write_many(transcripts)
+                return sum(1 for _ in store.TranscriptReader(path))
+
+        durations = [timed(transcript_io)[1] for _ in range(repeats)]
+        results["transcript_io"] = summarise(durations)
+        results["transcript_io"]["transcripts"] = len(transcripts)
+        results["transcript_io"]["peak_memory"] = peak_memory(transcript_io)
+
+    # 5. Fiat-Shamir signatures with the variant's prover and verifier (the biased challenge has
+    # no signature mode, a signature's challenge is a hash the verifier cannot bias)
+    if name != "biased_challenge":
+        signature = importlib.import_module("signature")
+        signer = signature.Signer(prover)
+        signature_verifier = signature.SignatureVerifier(verifier)
+        messages = [os.urandom(32) for _ in range(rounds)]
+
+        signatures = []
+        durations = []
+        for message in messages:
+            result, duration = timed(signer.sign, message)
+            signatures.append(result)
+            durations.append(duration)
+        results["sign"] = summarise(durations)
+        results["sign"]["peak_memory"] = peak_memory(signer.sign, messages[0])
+
+        results["verify"] = summarise([timed(signature_verifier.verify, message, result)[1] for message, result in zip(messages, signatures)])
+        results["verify"]["peak_memory"] = peak_memory(signature_verifier.verify, messages[0], signatures[0])
+
+        # batch entries are per signature, from repeats batches of all messages
+        durations = [timed(signer.sign_batch, messages)[1] / rounds for _ in range(repeats)]
+        results["sign_batch"] = summarise(durations)
+        results["sign_batch"]["signatures"] = rounds
+        results["sign_batch"]["peak_memory"] = peak_memory(signer.sign_batch, messages)
+
+        durations = [timed(signature_verifier.verify_batch, messages, signatures)[1] / rounds for _ in range(repeats)]
+        results["verify_batch"] = summarise(durations)
+        results["verify_batch"]["signatures"] = rounds
+        results["verify_batch"]["peak_memory"] = peak_memory(signature_verifier.verify_batch, messages, signatures)
+
+    if hasattr(protocol, "close"):
+        protocol.close()
+
+    return [dict(variant=name, bits=bits, operation=operation, **values) for operation, values in results.items()]
+
+def benchmark_arithmetic(bits, repeats):
+    # one full-size modular exponentiation mod p with the built-in pow and with the arithmetic
+    # backend the variants selected; the backend entry carries the speedup of its median
+    with open(os.path.join(ROOT, "primes.json"), "r") as f:
+        p = int(json.load(f)[f"bit_{bits}"].replace(" ", ""), 16)
+    exponents = [random.randint(1, p - 2) for _ in range(max(repeats, 5))]
+
+    builtin = summarise([timed(pow, 2, e, p)[1] for e in exponents])
+    builtin["peak_memory"] = peak_memory(pow, 2, exponents[0], p)
+    results = [dict(variant="arithmetic", bits=bits, operation="powmod_int", **builtin)]
+
+    if arithmetic.BACKEND != "int":
+        backend = summarise([timed(arithmetic.powmod, 2, e, p)[1] for e in exponents])
+        backend["peak_memory"] = peak_memory(arithmetic.powmod, 2, exponents[0], p)
+        backend["speedup"] = builtin["p50"] / backend["p50"]
+        results.append(dict(variant="arithmetic", bits=bits, operation=f"powmod_{arithmetic.BACKEND}", **backend))
+
+    return results
+
+def compare(results, baseline, tolerance):
+    # a result regresses if its median is more than tolerance slower than the baseline median
+    reference = {(entry["variant"], entry["bits"], entry["operation"]): entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        key = (entry["variant"], entry["bits"], entry["operation"])
+        if key in reference and entry["p50"] > reference[key]["p50"] * (1 + tolerance):
+            regressions.append((key, reference[key]["p50"], entry["p50"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark every protocol variant, bit size and hot primitive")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument("--bits", nargs="+", type=int, default=None, help="group sizes from primes.json (default: all)")
+    parser.add_argument("--rounds", type=int, default=20, help="protocol rounds per variant and size")
+    parser.add_argument("--repeats", type=int, default=3, help="repetitions of key recovery and transcript I/O")
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    parser.add_argument("--baseline", default=None, help="compare against a stored results file")
+    parser.add_argument("--save-baseline", default=None, help="store the results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging a regression")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--arithmetic", action="store_true", help="also time the arithmetic backend against the built-in pow")
+    parser.add_argument("--group", default="modp", help="modp (the primes.json groups) or a curve such as p256")
+    args = parser.parse_args()
+
+    # the protocols read primes.json from the working directory
+    os.chdir(ROOT)
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    # on a curve there is a single group, its entries carry the bit size of the group order
+    sizes = args.bits or bit_sizes()
+    if args.group != "modp":
+        os.environ["GROUP"] = args.group
+        sizes = [get_curve(args.group).bit_number]
+
+    results = []
+    for bits in sizes:
+        entries = [entry for name in args.variants for entry in benchmark_variant(name, bits, args.rounds, args.repeats)]
+        if args.arithmetic and args.group == "modp":
+            entries += benchmark_arithmetic(bits, args.repeats)
+
+        for entry in entries:
+            results.append(entry)
+            print(f"{entry['variant']:22} {entry['bits']:5} {entry['operation']:13} "
+                  f"p50 {entry['p50'] * 1e3:10.3f} ms  p99 {entry['p99'] * 1e3:10.3f} ms  "
+                  f"{entry['throughput']:10.1f} ops/s  peak {entry['peak_memory'] / 1024:8.1f} KiB"
+                  + (f"  speedup {entry['speedup']:.1f}x" if "speedup" in entry else ""))
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for (variant, bits, operation), before, after in regressions:
+            print(f"REGRESSION {variant} {bits} {operation}: p50 {before * 1e3:.3f} ms -> {after * 1e3:.3f} ms")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
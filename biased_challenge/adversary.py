@@ -0,0 +1,122 @@
+import time
+from math import gcd
+import numpy as np
+from aes_prf import aes_prf_batch
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.arithmetic import invert
+from shared.groups import Group
+
+def batch_inverse(values, q):
+    # inverses of all values mod q with a single modular inversion (Montgomery's trick),
+    # every value has to be invertible mod q
+    prefixes = []
+    product = 1
+    for value in values:
+        product = product * value % q
+        prefixes.append(product)
+
+    inverse = invert(product, q)
+    inverses = [0] * len(values)
+    for i in reversed(range(len(values))):
+        inverses[i] = inverse * prefixes[i - 1] % q if i else inverse
+        inverse = inverse * values[i] % q
+
+    return inverses
+
+class Adversary:
+    # the challenges of the subverted verifier are c_i = PRF(t_(i-1)), so with the backdoor key
+    # every challenge after the first one is known before the round starts
+    #
+    # the prover of this variant is honest, so its transcripts do not give x away: the adversary
+    # recognises the backdoored rounds (predict_challenges, subverted_rounds, analyse) but it is
+    # not a key extractor. Every transcript is one linear equation z_i = r_i - c_i * x mod q with
+    # a fresh unknown r_i; solve() only finds x where two equations share their r (a repeated
+    # commitment t with different challenges) or where an r is known from outside the transcripts
+    def __init__(self, protocol, backdoor_key):
+        self.protocol = protocol
+        self.backdoor_key = backdoor_key
+
+    def predict_challenges(self, transcripts):
+        # the challenge of every transcript after the first one, from the commitment before it
+        p, q, g = self.protocol.params
+        group = getattr(self.protocol, "group", None)
+        prf_length = group.prf_length if group is not None else p.bit_length() // 8
+        ts = [t for t, c, z in transcripts[:-1]]
+        if not ts:
+            return np.array([], dtype=object)
+        return aes_prf_batch(self.backdoor_key, ts, 128 // 8, prf_length)
+
+    def subverted_rounds(self, transcripts):
+        # True for every transcript whose challenge is the one the backdoor predicts, the first
+        # transcript of a session has a random challenge
+        predicted = self.predict_challenges(transcripts)
+        challenges = np.array([c for t, c, z in transcripts[1:]], dtype=object)
+        return np.concatenate([[False], predicted == challenges]).astype(bool)
+
+    def equations(self, transcripts, known_nonces=None):
+        # (index, numerator, denominator) with numerator = denominator * x mod q, in transcript
+        # order; index is the transcript that completes the equation
+        #
+        # z_i - z_j = (c_j - c_i) * x for a repeated commitment, r_i - z_i = c_i * x for a known r_i;
+        # only equations whose denominator is invertible mod q are kept (q is not prime in the test group)
+        p, q, g = self.protocol.params
+        known_nonces = known_nonces or {}
+        first = {}
+
+        for index, (t, c, z) in enumerate(transcripts):
+            if index in known_nonces and gcd(c, q) == 1:
+                yield index, (known_nonces[index] - z) % q, c % q
+
+            if t in first:
+                c_first, z_first = first[t]
+                if gcd(c - c_first, q) == 1:
+                    yield index, (z_first - z) % q, (c - c_first) % q
+            else:
+                first[t] = (c, z)
+
+    def analyse(self, transcripts):
+        # report of the backdoored rounds among the transcripts
+        start_time = time.perf_counter_ns()
+        subverted = int(self.subverted_rounds(transcripts).sum())
+        return {
+            "transcripts": len(transcripts),
+            "subverted_rounds": subverted,
+            "seconds": (time.perf_counter_ns() - start_time) / 1e9,
+        }
+
+    def solve(self, transcripts, known_nonces=None, chunk_size=1024):
+        # x from reused or known nonces (known_nonces maps transcript indices to their r), see
+        # above; returns (x or None, report). The equations are solved chunk_size at a time with one
+        # modular inversion per chunk, and every candidate is checked against A = g^x in order,
+        # so the report holds the number of transcripts it took to recover x
+        start_time = time.perf_counter_ns()
+        p, q, g = self.protocol.params
+        A = self.protocol.public_key
+        g_table = (getattr(self.protocol, "group", None) or Group(p.bit_length(), p, g)).g_table
+
+        secret_key = None
+        needed = None
+        solved = 0
+
+        equations = self.equations(transcripts, known_nonces)
+        while secret_key is None:
+            chunk = [equation for _, equation in zip(range(chunk_size), equations)]
+            if not chunk:
+                break
+
+            inverses = batch_inverse([denominator for _, _, denominator in chunk], q)
+            for (index, numerator, _), inverse in zip(chunk, inverses):
+                solved += 1
+                x = numerator * inverse % q
+                if g_table.pow(x) == A:
+                    secret_key, needed = x, index + 1
+                    break
+
+        report = {
+            "recovered": secret_key is not None,
+            "transcripts": needed if needed is not None else len(transcripts),
+            "equations": solved,
+            "subverted_rounds": int(self.subverted_rounds(transcripts).sum()),
+            "seconds": (time.perf_counter_ns() - start_time) / 1e9,
+        }
+        return secret_key, report
@@ -1,5 +1,7 @@
+from functools import lru_cache
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad
+import numpy as np
 
 def int_to_bytes(x, size):
     return x.to_bytes(size, 'big')
@@ -26,3 +28,41 @@ def aes_prf(key, t, output_length=16, input_length=16):
     encrypted_int = encrypted_int % (2 ** (128))
 
     return encrypted_int
+
+
+@lru_cache(maxsize=None)
+def ecb_cipher(key):
+    # one cached ECB cipher per key
+    return AES.new(key, AES.MODE_ECB)
+
+def int_rows(values, width):
+    # values as an (n, width) uint8 array of big-endian rows; 2D uint8 arrays are used as they are
+    if isinstance(values, np.ndarray) and values.dtype == np.uint8 and values.ndim == 2:
+        if values.shape[1] == width:
+            return values
+        rows = np.zeros((values.shape[0], width), dtype=np.uint8)
+        rows[:, width - values.shape[1]:] = values
+        return rows
+
+    data = b"".join(int(value).to_bytes(width, 'big') for value in values)
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+
+def pad_rows(rows):
+    # PKCS#7 padding of every row, same as Crypto.Util.Padding.pad
+    pad_length = 16 - rows.shape[1] % 16
+    padded = np.full((rows.shape[0], rows.shape[1] + pad_length), pad_length, dtype=np.uint8)
+    padded[:, :rows.shape[1]] = rows
+    return padded
+
+# batch version of aes_prf: ts is a list of ints or an (n, input_length) uint8 array,
+# returns the challenges as a NumPy array of ints that match aes_prf value for value
+def aes_prf_batch(key, ts, output_length=16, input_length=16):
+    padded_data = pad_rows(int_rows(ts, input_length))
+
+    # ECB encrypts every block on its own, so only the blocks covering the output are needed
+    n_blocks = min((output_length + 15) // 16, padded_data.shape[1] // 16)
+    blocks = np.ascontiguousarray(padded_data[:, :n_blocks * 16])
+    encrypted_bytes = np.frombuffer(ecb_cipher(key).encrypt(blocks.tobytes()), dtype=np.uint8)
+    encrypted_bytes = encrypted_bytes.reshape(padded_data.shape[0], n_blocks * 16)[:, :output_length]
+
+    return np.array([int.from_bytes(row.tobytes(), 'big') % (2 ** (128)) for row in encrypted_bytes], dtype=object)
@@ -0,0 +1,58 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.seeds import instance_seeds
+from subverted_schnorr import SchnorrIdentificationProtocol
+
+# protocol of the current worker process, created once by init_worker
+worker_protocol = None
+
+def init_worker(backdoor_key, secret_key):
+    # the shared state (group, x, backdoor key, fixed-base table) is set up once per worker
+    global worker_protocol
+    worker_protocol = SchnorrIdentificationProtocol(backdoor_key, secret_key)
+
+def run_shard(seed, rounds):
+    # every shard has its own RNG stream, so its transcripts do not depend on the worker that runs it
+    random.seed(seed)
+    worker_protocol.num_rounds = rounds
+
+    # every shard is its own verifier session, so the challenge chain starts again
+    worker_protocol.subverted_verifier.r_t = None
+
+    return worker_protocol.simulate()
+
+def simulate_parallel(protocol, workers=None, shard_size=256, seed=None):
+    # parallel version of protocol.simulate(): protocol.num_rounds rounds split into shards of
+    # shard_size rounds on a process pool, transcripts and time values are merged back in order
+    workers = workers or os.cpu_count()
+    shard_rounds = [min(shard_size, protocol.num_rounds - start) for start in range(0, protocol.num_rounds, shard_size)]
+
+    transcripts = []
+    time_values = []
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(protocol.bd_key, protocol.secret_key)) as pool:
+        for result in pool.map(run_shard, instance_seeds(seed, len(shard_rounds)), shard_rounds):
+            if result is None:
+                print("Verification failed")
+                return
+
+            transcripts.extend(result[0])
+            time_values.extend(result[1])
+
+    return transcripts, time_values
+
+def main():
+    backdoor_key = os.urandom(32)  # Use a random 32-byte key as the backdoor key
+
+    protocol = SchnorrIdentificationProtocol(backdoor_key)
+
+    start_time = time.perf_counter()
+    transcripts, time_values = simulate_parallel(protocol)
+    print("Number of transcripts: ", len(transcripts))
+    print("Time: ", time.perf_counter() - start_time)
+
+if __name__ == "__main__":
+    main()
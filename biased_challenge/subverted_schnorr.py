@@ -1,87 +1,121 @@
 import os
 import random
-import json
 import time
-from dotenv import load_dotenv
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.groups import Group, default_group
+from shared.commitment_pool import CommitmentPool
 from aes_prf import aes_prf
-
-def hex_to_int(hex_str):
-    hex_str = hex_str.replace(' ', '')
-    return int(hex_str, 16)
-
-def load_data(filename):
-    with open(filename, 'r') as file:
-        data = json.load(file)
-    return data
+from shared.instrumentation import DISABLED, phase
+from adversary import Adversary
 
 class HonestProver:
-    def __init__(self, p, q, g, x, A):
+    def __init__(self, p, q, g, x, A, group=None, pool=None, instrument=None):
         self.protocol = (p, q, g)
         self.secret_key = x
         self.public_key = A
         self.r = None
+        self.group = group if group is not None else Group(p.bit_length(), p, g)
+        self.g_table = self.group.g_table
+        self.pool = pool
+        self.instrument = instrument if instrument is not None else DISABLED
 
+    @phase("commitment")
     def prover_commitment(self):
         p, q, g = self.protocol
+
+        # with a commitment pool the (r, t) pair is precomputed and only the response is left online
+        if self.pool is not None:
+            self.r, t = self.pool.draw()
+            return t
+
         self.r = random.randint(1, q - 1)
-        t = pow(g, self.r, p)
+        t = self.g_table.pow(self.r)
         return t
     
+    @phase("response")
     def prover_response(self, c):
         p, q, _ = self.protocol
         z = (self.r - c * self.secret_key) % q
         return z
     
 class SubvertedVerifier:
-    def __init__(self, p, q, g, A, backdoor_key):
+    def __init__(self, p, q, g, A, backdoor_key, group=None, instrument=None):
         self.protocol = (p, q, g)
         self.public_key = A
+        self.public_key_valid = None
         self.c = None
         self.r_t = None
         self.bd_key = backdoor_key
+        self.group = group if group is not None else Group(p.bit_length(), p, g)
+        self.g_table = self.group.g_table
+        self.multi_exp = None
+        self.instrument = instrument if instrument is not None else DISABLED
 
+    @phase("challenge")
     def challenge(self, bits, commitment):
         p, q, _ = self.protocol
 
         if self.r_t is None:
             c = random.randint(1, pow(2, bits) - 1)
         else:
-            c = aes_prf(self.bd_key, self.r_t, 128 // 8, p.bit_length() // 8) # adjust to challenge size
+            with self.instrument.span("prf"):
+                c = aes_prf(self.bd_key, self.r_t, 128 // 8, self.group.prf_length) # adjust to challenge size
 
         self.r_t = commitment
         self.c = c
         
         return c
     
+    def check_public_key(self):
+        # A never changes, so the public key tests only run once
+        if self.public_key_valid is None:
+            # test if A is an element of the order-q group (for MODP: 1 <= A <= p - 1 and A ^ q = 1 mod p)
+            self.public_key_valid = self.group.is_element(self.public_key)
+
+        return self.public_key_valid
+
+    @phase("validate")
     def validate(self, t, z):
-        # test if A is in range 1 - (p - 1)
-        p, q, g = self.protocol
-        if self.public_key < 1 or self.public_key > p - 1:
-            return False
-        
-        # test if A ^ q = 1 mod p
-        if pow(self.public_key, q, p) != 1:
+        if not self.check_public_key():
             return False
 
-        # test if t = g^z * A^c mod p
-        left = t % p
-        right = (pow(g, z, p) * pow(self.public_key, self.c, p)) % p
+        return self.verify(t, self.c, z)
+
+    def verify(self, t, c, z):
+        # test if t = g^z * A^c in the group
+        left = self.group.reduce(t)
+        right = self.equation().pow((z, c))
         return left == right
+
+    def equation(self):
+        # g^z * A^c from fixed-base tables for g and A, A's table covers the 128-bit challenges;
+        # it is built on the first verification, after that a round costs no squarings
+        if self.multi_exp is None:
+            self.multi_exp = self.group.multi_exp([self.g_table, self.group.fixed_base(self.public_key, max_bits=128)])
+        return self.multi_exp
+
+    def validate_batch(self, transcripts, security_bits=64):
+        # verify many (t, c, z) transcripts at once, returns (valid, index of the first invalid transcript)
+        if not transcripts:
+            return True, None
+
+        if not self.check_public_key():
+            return False, 0
+
+        index = self.group.batch_check(self.public_key, transcripts, self.verify, security_bits)
+        return index is None, index
     
 class SchnorrIdentificationProtocol:
-    def __init__(self, backdoor_key):
-        load_dotenv()
-        bit_number = int(os.getenv('BIT_NUMBER')) # type: ignore
-        self.num_rounds = bit_number + 1
-
-        # load the json data
-        data = load_data('primes.json')
-        p = hex_to_int(data[f'bit_{bit_number}'])
-        q = (p - 1) // 2
-        g = data['generator']
-
-        x = random.randint(1, q - 1)
-        A = pow(g, x, p)
+    def __init__(self, backdoor_key, secret_key=None, pool_size=None, instrument=None):
+        # group (MODP or curve, see groups.default_group) and the fixed-base table for g,
+        # shared by every instance in the process
+        self.group = default_group()
+        self.num_rounds = self.group.bit_number + 1
+        p, q, g = self.group.params
+        self.g_table = self.group.g_table
+
+        x = random.randint(1, q - 1) if secret_key is None else secret_key
+        A = self.g_table.pow(x)
         self.params = (p, q, g)
         self.secret_key = x
         self.public_key = A
@@ -89,36 +123,65 @@ class SchnorrIdentificationProtocol:
         self.bd_key = backdoor_key
         self.counter = 0
 
-        self.honest_prover = HonestProver(p, q, g, x, A)
-        self.subverted_verifier = SubvertedVerifier(p, q, g, A, backdoor_key)
+        # optional background pool of precomputed commitments
+        self.pool = CommitmentPool(p, q, g, pool_size, group=self.group) if pool_size else None
 
-    def simulate(self):
-        
+        # per-phase timings of prover and verifier, off unless an enabled Instrument is passed
+        self.instrument = instrument if instrument is not None else DISABLED
+
+        self.honest_prover = HonestProver(p, q, g, x, A, self.group, self.pool, self.instrument)
+        self.subverted_verifier = SubvertedVerifier(p, q, g, A, backdoor_key, self.group, self.instrument)
+
+    def close(self):
+        # stops the commitment pool's refill worker
+        if self.pool is not None:
+            self.pool.close()
+
+    def simulate(self, batch_size=None):
+        # with a batch_size, rounds are not verified one by one but in batches of
+        # batch_size transcripts, so the recorded round time excludes validation
+        #
+        # time_values holds the wall time of every round in seconds, from the start of the
+        # commitment to the end of validation, the challenge alone is the instrument's
+        # "challenge" phase
         transcripts = []
         time_values = []
+        verified = 0
 
         for _ in range(self.num_rounds):
+            start_time = time.perf_counter_ns()
+
             t = self.honest_prover.prover_commitment()
 
             challenge_bits = 128 # number of bits in the challenge
-
-            start_time = time.time()
-
             c = self.subverted_verifier.challenge(challenge_bits, t)
 
-            total_time = time.time() - start_time
-            time_values.append(total_time)
-
             z = self.honest_prover.prover_response(c)
-            valid = self.subverted_verifier.validate(t, z)
+            valid = self.subverted_verifier.validate(t, z) if batch_size is None else True
+
+            total_time = time.perf_counter_ns() - start_time
+            time_values.append(total_time / 1e9)
+            self.instrument.record("round", total_time)
 
             if not valid:
                 print("Verification failed")
                 return
-            
 
             transcripts.append((t, c, z))
-            
+
+            if batch_size is not None and len(transcripts) - verified >= batch_size:
+                valid, index = self.subverted_verifier.validate_batch(transcripts[verified:])
+                if not valid:
+                    print("Verification failed")
+                    return
+                verified = len(transcripts)
+
+        if batch_size is not None and len(transcripts) > verified:
+            valid, index = self.subverted_verifier.validate_batch(transcripts[verified:])
+            if not valid:
+                print("Verification failed")
+                return
+
         return transcripts, time_values
 
 
@@ -127,9 +190,14 @@ def main():
     backdoor_key = os.urandom(32)  # Use a random 32-byte key as the backdoor key
 
     protocol = SchnorrIdentificationProtocol(backdoor_key)
+    adversary = Adversary(protocol, backdoor_key)
 
     transcripts, time_values = protocol.simulate()
 
+    # the backdoor predicts the challenges; the prover is honest, so x stays hidden
+    report = adversary.analyse(transcripts)
+    print("Predicted challenges:", report["subverted_rounds"], "of", report["transcripts"])
+    print("Time: ", report["seconds"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,34 @@
+import os
+from functools import partial
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared import transport
+from subverted_schnorr import HonestProver, SubvertedVerifier, SchnorrIdentificationProtocol
+
+# the identification protocol over the shared asyncio transport (see shared/transport.py),
+# with the subverted verifier: every session has its own verifier, so the challenge chain
+# follows the commitments of that session
+
+def subverted_challenge(verifier, bits, t):
+    # the challenge of every round but the first is derived from the previous commitment
+    return verifier.challenge(bits, t)
+
+def endpoints(protocol):
+    # prover, session verifier and worker verifier factories of a protocol instance; validation
+    # does not involve the backdoor, so the workers do not get the key
+    p, q, g = protocol.params
+    A = protocol.public_key
+    return (partial(HonestProver, p, q, g, protocol.secret_key, A, protocol.group),
+            partial(SubvertedVerifier, p, q, g, A, protocol.bd_key, protocol.group),
+            partial(SubvertedVerifier, p, q, g, A, None, protocol.group))
+
+def run_load(protocol, sessions=1000, rounds=1, concurrency=512, workers=None, address=("127.0.0.1", 0)):
+    new_prover, new_verifier, worker_verifier = endpoints(protocol)
+    return transport.run_load(protocol.group, new_prover, new_verifier, worker_verifier, subverted_challenge,
+                              sessions=sessions, rounds=rounds, concurrency=concurrency, workers=workers, address=address)
+
+def main():
+    # Use a random 32-byte key as the backdoor key
+    transport.main(run_load, lambda: SchnorrIdentificationProtocol(os.urandom(32)))
+
+if __name__ == "__main__":
+    main()
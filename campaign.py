@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import random
+import argparse
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from benchmark import ROOT, use_variant
+from shared.seeds import instance_seeds
+
+# variants with an adversary that recovers the secret key; the biased challenge variant has an
+# honest prover, so its transcripts do not determine x and it is not an attack
+ATTACKS = ("stateless_commitment", "stateful_commitment")
+
+# variant name and module of this process, set up once by init_worker; the group, its fixed-base
+# table and the PRF ciphers are cached per process, so every instance after the first reuses them
+variant = None
+
+def init_worker(name, bits, group="modp"):
+    global variant
+    # the protocols read primes.json from the working directory
+    os.chdir(ROOT)
+    os.environ["GROUP"] = group
+    if bits is not None:
+        os.environ["BIT_NUMBER"] = str(bits)
+    variant = (name, use_variant(name))
+
+def bit_errors(secret_key, recovered_bits):
+    # wrong or missing bits of the recovered key
+    original_bits = [int(bit) for bit in bin(secret_key)[2:]]
+    errors = sum(1 for original, recovered in zip(original_bits, recovered_bits) if original != recovered)
+    return errors + max(len(original_bits) - len(recovered_bits), 0)
+
+def recover(name, protocol, adversary, transcripts):
+    # (recovered, number of wrong key bits)
+    secret_key = protocol.secret_key
+    if name == "stateless_commitment":
+        errors = bit_errors(secret_key, adversary.obtain_secret(transcripts))
+        return errors == 0, errors
+
+    # the chain starts at the second bit of x, so the last recovered bit is the first one
+    recovered_bits = adversary.obtain_secret(transcripts, workers=1)[:secret_key.bit_length()]
+    errors = bit_errors(secret_key, recovered_bits[-1:] + recovered_bits[:-1])
+    return errors == 0, errors
+
+def run_instance(index, seed, backdoor_key, store_folder):
+    # one independent (x, backdoor key) instance: simulate, recover and time it
+    name, module = variant
+    random.seed(seed)
+    if backdoor_key is None:
+        backdoor_key = random.randbytes(32)
+
+    start_time = time.perf_counter()
+    protocol = module.SchnorrIdentificationProtocol(backdoor_key)
+    adversary = importlib.import_module("adversary").Adversary(protocol, backdoor_key)
+
+    # the stateless transcripts are streamed to a store of their own per instance
+    if store_folder is not None and name == "stateless_commitment":
+        folder = os.path.join(store_folder, f"instance_{index}")
+        os.makedirs(folder, exist_ok=True)
+        with adversary.transcript_writer(folder, protocol) as store:
+            result = protocol.simulate(store=store)
+        if result is not None:
+            adversary.save_attack(None, protocol, result[1], folder)
+    else:
+        result = protocol.simulate()
+
+    simulate_time = time.perf_counter() - start_time
+    if hasattr(protocol, "close"):
+        protocol.close()
+
+    record = {"index": index, "seed": seed, "valid": result is not None, "simulate_time": simulate_time}
+    if result is None:
+        return record
+
+    transcripts, time_values = result
+    recovered, errors = recover(name, protocol, adversary, transcripts)
+    record.update({
+        "rounds": len(transcripts),
+        "recovered": bool(recovered),
+        "bit_errors": errors,
+        "recovery_time": time.perf_counter() - start_time - simulate_time,
+        "wall_time": time.perf_counter() - start_time,
+    })
+    return record
+
+def run_campaign(name, bits, instances, workers=1, seed=None, backdoor_key=None, store_folder=None, group="modp"):
+    # yields one record per instance in order; with workers=1 the instances run one after the
+    # other in this process, otherwise on a process pool of workers processes
+    seeds = instance_seeds(seed, instances)
+    arguments = (range(instances), seeds, [backdoor_key] * instances, [store_folder] * instances)
+
+    if workers == 1:
+        init_worker(name, bits, group)
+        yield from map(run_instance, *arguments)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(name, bits, group)) as pool:
+        yield from pool.map(run_instance, *arguments)
+
+def aggregate(records, wall_time):
+    valid = [record for record in records if record["valid"]]
+    summary = {
+        "instances": len(records),
+        "verification_failures": len(records) - len(valid),
+        "wall_time": wall_time,
+    }
+    if valid:
+        rounds = np.array([record["rounds"] for record in valid])
+        summary.update({
+            "success_rate": float(np.mean([record["recovered"] for record in valid])),
+            "rounds_mean": float(rounds.mean()),
+            "rounds_p50": float(np.percentile(rounds, 50)),
+            "rounds_max": int(rounds.max()),
+            "instance_time_mean": float(np.mean([record["wall_time"] for record in valid])),
+            "recovery_time_mean": float(np.mean([record["recovery_time"] for record in valid])),
+        })
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="run many independent (x, backdoor key) attack instances and aggregate them")
+    parser.add_argument("variant", choices=ATTACKS)
+    parser.add_argument("--bits", type=int, default=None, help="group size from primes.json (MODP groups)")
+    parser.add_argument("--group", default="modp", help="modp (the primes.json group of --bits) or a curve such as p256")
+    parser.add_argument("--instances", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1, help="processes, 1 runs the instances in this process")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--shared-backdoor-key", action="store_true", help="one backdoor key for all instances")
+    parser.add_argument("--store", default=None, help="folder for the per-instance results (and stateless transcripts)")
+    args = parser.parse_args()
+    if args.group == "modp" and args.bits is None:
+        parser.error("--bits is required for the MODP groups")
+
+    backdoor_key = os.urandom(32) if args.shared_backdoor_key else None
+    store_folder = os.path.abspath(args.store) if args.store else None
+    if store_folder is not None:
+        os.makedirs(store_folder, exist_ok=True)
+
+    records = []
+    results = open(os.path.join(store_folder, "results.jsonl"), "w") if store_folder else None
+    start_time = time.perf_counter()
+    try:
+        for record in run_campaign(args.variant, args.bits, args.instances, args.workers, args.seed, backdoor_key, store_folder, args.group):
+            records.append(record)
+            if results is not None:
+                results.write(json.dumps(record) + "\n")
+                results.flush()
+    finally:
+        if results is not None:
+            results.close()
+
+    summary = aggregate(records, time.perf_counter() - start_time)
+    if store_folder is not None:
+        with open(os.path.join(store_folder, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+
+    for key, value in summary.items():
+        print(f"{key:22} {value}")
+
+if __name__ == "__main__":
+    main()
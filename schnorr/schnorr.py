@@ -1,80 +1,130 @@
-import os
 import random
-import json
-from dotenv import load_dotenv
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.groups import Group, default_group
+from shared.commitment_pool import CommitmentPool
+from shared.instrumentation import DISABLED, phase
 
-def hex_to_int(hex_str):
-    hex_str = hex_str.replace(' ', '')
-    return int(hex_str, 16)
-
-def load_data(filename):
-    with open(filename, 'r') as file:
-        data = json.load(file)
-    return data
-    
 class HonestProver:
-    def __init__(self, p, q, g, x, A):
+    def __init__(self, p, q, g, x, A, group=None, pool=None, instrument=None):
         self.protocol = (p, q, g)
         self.secret_key = x
         self.public_key = A
         self.r = None
+        self.group = group if group is not None else Group(p.bit_length(), p, g)
+        self.g_table = self.group.g_table
+        self.pool = pool
+        self.instrument = instrument if instrument is not None else DISABLED
+
+    def precompute(self, n):
+        # offline phase: n (r, t) pairs into the commitment pool, a pool without a refill
+        # thread is created for them if the prover has none
+        if self.pool is None:
+            p, q, g = self.protocol
+            self.pool = CommitmentPool(p, q, g, 0, group=self.group)
+        self.pool.fill(n)
 
+    @phase("commitment")
     def prover_commitment(self):
         p, q, g = self.protocol
+
+        # with a commitment pool the (r, t) pair is precomputed and only the response is left online
+        if self.pool is not None:
+            self.r, t = self.pool.draw()
+            return t
+
         self.r = random.randint(1, q - 1)
-        t = pow(g, self.r, p)
+        t = self.g_table.pow(self.r)
         return t
     
+    @phase("response")
     def prover_response(self, c):
         p, q, _ = self.protocol
         z = (self.r - c * self.secret_key) % q
         return z
     
 class HonestVerifier:
-    def __init__(self, p, q, g, A):
+    def __init__(self, p, q, g, A, group=None, instrument=None):
         self.protocol = (p, q, g)
         self.public_key = A
+        self.public_key_valid = None
         self.c = None
+        self.group = group if group is not None else Group(p.bit_length(), p, g)
+        self.g_table = self.group.g_table
+        self.multi_exp = None
+        self.instrument = instrument if instrument is not None else DISABLED
 
+    @phase("challenge")
     def challenge(self, bits):
         p, _, _ = self.protocol
         self.c = random.randint(1, pow(2, bits) - 1)
         return self.c
     
+    def check_public_key(self):
+        # A never changes, so the public key tests only run once
+        if self.public_key_valid is None:
+            # test if A is an element of the order-q group (for MODP: 1 <= A <= p - 1 and A ^ q = 1 mod p)
+            self.public_key_valid = self.group.is_element(self.public_key)
+
+        return self.public_key_valid
+
+    @phase("validate")
     def validate(self, t, z):
-        # test if A is in range 1 - (p - 1)
-        p, q, g = self.protocol
-        if self.public_key < 1 or self.public_key > p - 1:
-            return False
-        
-        # test if A ^ q = 1 mod p
-        if pow(self.public_key, q, p) != 1:
+        if not self.check_public_key():
             return False
 
-        # test if t = g^z * A^c mod p
-        left = t % p
-        right = (pow(g, z, p) * pow(self.public_key, self.c, p)) % p
+        return self.verify(t, self.c, z)
+
+    def verify(self, t, c, z):
+        # test if t = g^z * A^c in the group
+        left = self.group.reduce(t)
+        right = self.equation().pow((z, c))
         return left == right
+
+    def equation(self):
+        # g^z * A^c from fixed-base tables for g and A, A's table covers the 128-bit challenges;
+        # it is built on the first verification, after that a round costs no squarings
+        if self.multi_exp is None:
+            self.multi_exp = self.group.multi_exp([self.g_table, self.group.fixed_base(self.public_key, max_bits=128)])
+        return self.multi_exp
+
+    def validate_batch(self, transcripts, security_bits=64):
+        # verify many (t, c, z) transcripts at once, returns (valid, index of the first invalid transcript)
+        if not transcripts:
+            return True, None
+
+        if not self.check_public_key():
+            return False, 0
+
+        index = self.group.batch_check(self.public_key, transcripts, self.verify, security_bits)
+        return index is None, index
     
 class SchnorrIdentificationProtocol3:
-    def __init__(self):
-        load_dotenv()
-        bit_number = int(os.getenv('BIT_NUMBER')) # type: ignore
-
-        # load the json data
-        data = load_data('primes.json')
-        p = hex_to_int(data[f'bit_{bit_number}'])
-        q = (p - 1) // 2
-        g = data['generator']
+    def __init__(self, pool_size=None, instrument=None):
+        # group (MODP or curve, see groups.default_group) and the fixed-base table for g,
+        # shared by every instance in the process
+        self.group = default_group()
+        p, q, g = self.group.params
+        self.g_table = self.group.g_table
 
         x = random.randint(1, q - 1)
-        y = pow(g, x, p)
+        y = self.g_table.pow(x)
         self.params = (p, q, g)
         self.secret_key = x
         self.public_key = y
 
-        self.honest_prover = HonestProver(p, q, g, x, y)
-        self.honest_verifier = HonestVerifier(p, q, g, y)
+        # optional background pool of precomputed commitments
+        self.pool = CommitmentPool(p, q, g, pool_size, group=self.group) if pool_size else None
+
+        # per-phase timings of prover and verifier, off unless an enabled Instrument is passed
+        self.instrument = instrument if instrument is not None else DISABLED
+
+        self.honest_prover = HonestProver(p, q, g, x, y, self.group, self.pool, self.instrument)
+        self.honest_verifier = HonestVerifier(p, q, g, y, self.group, self.instrument)
+
+    def close(self):
+        # stops the commitment pool's refill worker
+        if self.pool is not None:
+            self.pool.close()
 
     def simulate(self):
         t = self.honest_prover.prover_commitment()
@@ -0,0 +1,48 @@
+import time
+import argparse
+from schnorr import SchnorrIdentificationProtocol3
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.signature import Signer, SignatureVerifier
+
+# Fiat-Shamir signatures (see shared/signature.py) with the honest prover and verifier, the
+# commitments come from the prover's fixed-base table, precomputed pairs and pool
+
+class SchnorrSignatureScheme:
+    # key pair, signer and verifier on top of the identification protocol's prover and verifier
+    def __init__(self, pool_size=None, instrument=None):
+        self.protocol = SchnorrIdentificationProtocol3(pool_size, instrument)
+        self.group = self.protocol.group
+        self.params = self.protocol.params
+        self.secret_key = self.protocol.secret_key
+        self.public_key = self.protocol.public_key
+
+        self.signer = Signer(self.protocol.honest_prover)
+        self.verifier = SignatureVerifier(self.protocol.honest_verifier)
+
+    def close(self):
+        self.protocol.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="batch Fiat-Shamir signing and verification")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--pool-size", type=int, default=None, help="background pool of precomputed commitments")
+    args = parser.parse_args()
+
+    scheme = SchnorrSignatureScheme(args.pool_size)
+    messages = [f"message {i}".encode() for i in range(args.messages)]
+
+    start_time = time.perf_counter()
+    signatures = scheme.signer.sign_batch(messages)
+    sign_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    valid, index = scheme.verifier.verify_batch(messages, signatures)
+    verify_time = time.perf_counter() - start_time
+    scheme.close()
+
+    print("Valid:", valid)
+    print("Signatures per second:", len(messages) / sign_time)
+    print("Verifications per second:", len(messages) / verify_time)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+from functools import partial
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared import transport
+from schnorr import HonestProver, HonestVerifier, SchnorrIdentificationProtocol3
+
+# the identification protocol over the shared asyncio transport (see shared/transport.py),
+# with an honest prover and an honest verifier
+
+def endpoints(protocol):
+    # prover and verifier factories of a protocol instance
+    p, q, g = protocol.params
+    A = protocol.public_key
+    return partial(HonestProver, p, q, g, protocol.secret_key, A, protocol.group), partial(HonestVerifier, p, q, g, A, protocol.group)
+
+def run_load(protocol, sessions=1000, rounds=1, concurrency=512, workers=None, address=("127.0.0.1", 0)):
+    new_prover, new_verifier = endpoints(protocol)
+    return transport.run_load(protocol.group, new_prover, new_verifier, sessions=sessions, rounds=rounds,
+                              concurrency=concurrency, workers=workers, address=address)
+
+def main():
+    transport.main(run_load, SchnorrIdentificationProtocol3)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# code shared by all protocol variants, imported as shared.<module> (see repo_root.py in the
+# variant directories)
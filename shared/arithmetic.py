@@ -0,0 +1,43 @@
+import os
+from shared.env import load_env
+
+# big-integer backend for modular exponentiation, chosen once at import: gmpy2 when it is
+# installed, CPython's built-in ints otherwise; ARITHMETIC_BACKEND=int forces the built-in
+# one and ARITHMETIC_BACKEND=gmpy2 fails instead of falling back (in the environment or in
+# .env, which is loaded first)
+#
+# values handed out are always plain ints, backend numbers only live inside powmod and the
+# precomputed tables, so transcripts, files and the PRF are the same for every backend
+BACKEND = "int"
+
+load_env()
+if os.getenv("ARITHMETIC_BACKEND", "auto") != "int":
+    try:
+        import gmpy2
+        BACKEND = "gmpy2"
+    except ImportError:
+        if os.getenv("ARITHMETIC_BACKEND") == "gmpy2":
+            raise
+
+if BACKEND == "gmpy2":
+    to_backend = gmpy2.mpz
+
+    def from_backend(value):
+        return int(value)
+
+    def powmod(base, exponent, modulus):
+        return int(gmpy2.powmod(base, exponent, modulus))
+
+    def invert(value, modulus):
+        return int(gmpy2.invert(value, modulus))
+else:
+    def to_backend(value):
+        return value
+
+    def from_backend(value):
+        return value
+
+    powmod = pow
+
+    def invert(value, modulus):
+        return pow(value, -1, modulus)
@@ -0,0 +1,176 @@
+import random
+import threading
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from shared.groups import Group
+
+# fixed-base table of the refill process, created once by init_worker
+worker_table = None
+
+def init_worker(group):
+    global worker_table
+    # a forked worker starts with the parent's RNG state, so it has to be reseeded
+    random.seed()
+    worker_table = group.g_table
+
+def compute_pairs(q, n):
+    pairs = []
+    for _ in range(n):
+        r = random.randint(1, q - 1)
+        pairs.append((r, worker_table.pow(r)))
+    return pairs
+
+class CommitmentPool:
+    # bounded pool of precomputed (r, t = g^r) pairs, commitments do not depend on the challenge
+    #
+    # a background thread refills the pool up to size as soon as it drops below low_watermark;
+    # with use_process the pairs are computed in a separate process, so the refill does not
+    # compete with the online rounds for the interpreter. A pool of size 0 has no refill thread
+    # and only holds the pairs added by fill()
+    #
+    # with a source (a function returning the next (r, t) pair, e.g. NonceGenerator.next of the
+    # stateful prover) the pairs come from it instead of a random r, and they are handed out in
+    # the order the source produced them; the source keeps its state in this process, so it
+    # cannot be combined with use_process
+    def __init__(self, p, q, g, size=1024, low_watermark=None, group=None, use_process=False, batch_size=64, block=False, source=None):
+        if source is not None and use_process:
+            raise ValueError("a pool with a source computes its pairs in this process")
+
+        self.protocol = (p, q, g)
+        self.size = size
+        self.low_watermark = size // 4 if low_watermark is None else low_watermark
+        self.batch_size = batch_size
+        self.block = block
+        self.group = group if group is not None else Group(p.bit_length(), p, g)
+        self.g_table = self.group.g_table
+
+        # hits: served from the pool, misses: pool was empty, stalls: a draw waited for the refill
+        self.hits = 0
+        self.misses = 0
+        self.stalls = 0
+
+        self.pairs = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # held while pairs are computed and queued, so pairs of a source are queued in order
+        self.source = source
+        self.source_lock = threading.Lock()
+
+        self.executor = ProcessPoolExecutor(1, initializer=init_worker, initargs=(self.group,)) if use_process else None
+        self.thread = None
+        if size:
+            self.thread = threading.Thread(target=self.refill, daemon=True)
+            self.thread.start()
+
+    def compute_pairs(self, n):
+        p, q, g = self.protocol
+        if self.source is not None:
+            return [self.source() for _ in range(n)]
+
+        if self.executor is not None:
+            return self.executor.submit(compute_pairs, q, n).result()
+
+        pairs = []
+        for _ in range(n):
+            r = random.randint(1, q - 1)
+            pairs.append((r, self.g_table.pow(r)))
+        return pairs
+
+    def refill(self):
+        while True:
+            with self.condition:
+                # sleep until the pool runs low
+                while not self.closed and len(self.pairs) >= self.low_watermark:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                missing = self.size - len(self.pairs)
+
+            # fill up to size in batches, draws can go on in between
+            while missing > 0 and not self.closed:
+                with self.source_lock:
+                    pairs = self.compute_pairs(min(self.batch_size, missing))
+                    with self.condition:
+                        self.pairs.extend(pairs)
+                        missing = self.size - len(self.pairs)
+                        self.condition.notify_all()
+
+    def fill(self, n):
+        # offline phase: n more pairs, computed in the calling thread
+        with self.source_lock:
+            pairs = self.compute_pairs(n)
+            with self.condition:
+                self.pairs.extend(pairs)
+                self.condition.notify_all()
+
+    def try_draw(self):
+        # a precomputed (r, t) pair, or None if the pool is empty (unless block is set,
+        # then the draw waits for the refill instead)
+        with self.condition:
+            if self.pairs:
+                self.hits += 1
+                pair = self.pairs.popleft()
+                if len(self.pairs) < self.low_watermark:
+                    self.condition.notify_all()
+                return pair
+
+            self.misses += 1
+            self.condition.notify_all()
+            if not self.block or self.closed or self.thread is None:
+                return None
+
+            self.stalls += 1
+            while not self.pairs and not self.closed:
+                self.condition.wait()
+            return self.pairs.popleft() if self.pairs else None
+
+    def draw(self):
+        # a precomputed (r, t) pair, computed on the spot on a miss
+        pair = self.try_draw()
+        if pair is not None:
+            return pair
+
+        if self.source is None:
+            p, q, g = self.protocol
+            r = random.randint(1, q - 1)
+            return r, self.g_table.pow(r)
+
+        # the pairs the refill is computing come before the next one of the source
+        with self.source_lock:
+            with self.condition:
+                if self.pairs:
+                    return self.pairs.popleft()
+            return self.source()
+
+    @contextmanager
+    def paused(self):
+        # no pairs are computed while the block runs, so the caller can change or save the
+        # state of the source
+        with self.source_lock:
+            yield
+
+    def clear(self):
+        # drops the queued pairs, e.g. once the source was moved (inside paused())
+        with self.condition:
+            self.pairs.clear()
+            self.condition.notify_all()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "stalls": self.stalls, "level": len(self.pairs)}
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
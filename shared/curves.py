@@ -0,0 +1,203 @@
+from shared.arithmetic import invert
+
+# prime-order short Weierstrass curves y^2 = x^3 - 3x + b over GF(p), pure Python
+#
+# points are affine (x, y) tuples or Jacobian (X, Y, Z) triples with x = X / Z^2, y = Y / Z^3;
+# the point at infinity is None in affine and has Z = 0 in Jacobian coordinates. Outside this
+# module a point is the int of its compressed SEC1 encoding (0x02 / 0x03 prefix and x), so
+# commitments, public keys and transcripts stay plain ints as in the MODP groups
+CURVES = {
+    "p256": {
+        "p": 0xffffffff00000001000000000000000000000000ffffffffffffffffffffffff,
+        "b": 0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b,
+        "n": 0xffffffff00000000ffffffffffffffffbce6faada7179e84f3b9cac2fc632551,
+        "gx": 0x6b17d1f2e12c4247f8bce6e563a440f277037d812deb33a0f4a13945d898c296,
+        "gy": 0x4fe342e2fe1a7f9b8ee7eb4a7c0f9e162bce33576b315ececbb6406837bf51f5,
+    },
+}
+
+INFINITY = (1, 1, 0)
+
+class Curve:
+    def __init__(self, name, p, b, n, gx, gy):
+        self.name = name
+        self.p = p
+        self.b = b
+        self.n = n
+        self.generator = (gx, gy)
+
+        # bytes of a field element, an encoded point has one more for the prefix
+        self.field_length = (p.bit_length() + 7) // 8
+        self.x_mask = (1 << (8 * self.field_length)) - 1
+
+    def double(self, P):
+        # dbl-2001-b, a = -3
+        X1, Y1, Z1 = P
+        if not Z1 or not Y1:
+            return INFINITY
+
+        p = self.p
+        delta = Z1 * Z1 % p
+        gamma = Y1 * Y1 % p
+        beta = X1 * gamma % p
+        alpha = 3 * (X1 - delta) * (X1 + delta) % p
+        X3 = (alpha * alpha - 8 * beta) % p
+        Z3 = ((Y1 + Z1) * (Y1 + Z1) - gamma - delta) % p
+        Y3 = (alpha * (4 * beta - X3) - 8 * gamma * gamma) % p
+        return X3, Y3, Z3
+
+    def add_affine(self, P, Q):
+        # Jacobian P + affine Q (madd-2007-bl)
+        X1, Y1, Z1 = P
+        x2, y2 = Q
+        if not Z1:
+            return x2, y2, 1
+
+        p = self.p
+        Z1Z1 = Z1 * Z1 % p
+        U2 = x2 * Z1Z1 % p
+        S2 = y2 * Z1 * Z1Z1 % p
+        H = (U2 - X1) % p
+        r = 2 * (S2 - Y1) % p
+        if not H:
+            return self.double(P) if not r else INFINITY
+
+        HH = H * H % p
+        I = 4 * HH % p
+        J = H * I % p
+        V = X1 * I % p
+        X3 = (r * r - J - 2 * V) % p
+        Y3 = (r * (V - X3) - 2 * Y1 * J) % p
+        Z3 = ((Z1 + H) * (Z1 + H) - Z1Z1 - HH) % p
+        return X3, Y3, Z3
+
+    def to_affine(self, P):
+        X, Y, Z = P
+        if not Z:
+            return None
+        p = self.p
+        z_inverse = invert(Z, p)
+        z_inverse2 = z_inverse * z_inverse % p
+        return X * z_inverse2 % p, Y * z_inverse2 * z_inverse % p
+
+    def normalize(self, points):
+        # affine versions of Jacobian points (none at infinity) with one inversion (Montgomery's trick)
+        p = self.p
+        prefixes = []
+        product = 1
+        for X, Y, Z in points:
+            product = product * Z % p
+            prefixes.append(product)
+
+        inverse = invert(product, p)
+        affine = [None] * len(points)
+        for i in reversed(range(len(points))):
+            X, Y, Z = points[i]
+            z_inverse = inverse * prefixes[i - 1] % p if i else inverse
+            inverse = inverse * Z % p
+            z_inverse2 = z_inverse * z_inverse % p
+            affine[i] = (X * z_inverse2 % p, Y * z_inverse2 * z_inverse % p)
+        return affine
+
+    def multiply(self, point, e):
+        # e * point for an affine point, left-to-right double-and-add; returns an affine point
+        result = INFINITY
+        for bit in bin(e % self.n)[2:]:
+            result = self.double(result)
+            if bit == "1":
+                result = self.add_affine(result, point)
+        return self.to_affine(result)
+
+    def on_curve(self, point):
+        x, y = point
+        p = self.p
+        return (y * y - (x * x * x - 3 * x + self.b)) % p == 0
+
+    def encode(self, point):
+        # compressed SEC1 encoding as an int, 0 for the point at infinity
+        if point is None:
+            return 0
+        x, y = point
+        return (2 | (y & 1)) << (8 * self.field_length) | x
+
+    def decode(self, value):
+        # affine point of an encoded int, None if it is not the encoding of a curve point
+        prefix, x = value >> (8 * self.field_length), value & self.x_mask
+        p = self.p
+        if prefix not in (2, 3) or x >= p:
+            return None
+
+        # p = 3 mod 4, so a square root is a single exponentiation
+        rhs = (x * x * x - 3 * x + self.b) % p
+        y = pow(rhs, (p + 1) // 4, p)
+        if y * y % p != rhs:
+            return None
+        if y & 1 != prefix & 1:
+            y = p - y
+        return x, y
+
+class CurveFixedBase:
+    # precomputed windowed table for a fixed point, the curve version of FixedBaseExp:
+    # table[i][d] = d * 2^(window * i) * base, so e * base is one mixed addition per window of e
+    # and no doublings; base and the results of pow() are encoded points
+    def __init__(self, curve, base, max_bits=None, window=5):
+        if max_bits is None:
+            max_bits = curve.n.bit_length()
+
+        self.curve = curve
+        self.g = base
+        self.point = curve.decode(base)
+        self.window = window
+        self.max_bits = max_bits
+        self.mask = (1 << window) - 1
+        self.table = []
+
+        point = self.point
+        for _ in range((max_bits + window - 1) // window):
+            row = [(point[0], point[1], 1)]
+            for _ in range(2, 1 << window):
+                row.append(curve.add_affine(row[-1], point))
+
+            # 2^window * point starts the next row, normalised together with the row
+            row.append(curve.add_affine(row[-1], point))
+            affine = curve.normalize(row)
+            self.table.append([None] + affine[:-1])
+            point = affine[-1]
+
+    def add_to(self, result, e):
+        # Jacobian result + e * base
+        curve = self.curve
+        e %= curve.n
+
+        # exponents outside the precomputed range fall back to a plain scalar multiplication
+        if e.bit_length() > self.max_bits:
+            point = curve.multiply(self.point, e)
+            return result if point is None else curve.add_affine(result, point)
+
+        window = self.window
+        mask = self.mask
+        for row in self.table:
+            if not e:
+                break
+            d = e & mask
+            if d:
+                result = curve.add_affine(result, row[d])
+            e >>= window
+
+        return result
+
+    def pow(self, e):
+        return self.curve.encode(self.curve.to_affine(self.add_to(INFINITY, e)))
+
+class CurveMultiExp:
+    # sum of e_i * base_i for fixed points (g and A of a verifier), the curve version of
+    # FixedBaseMultiExp: all windows of all exponents go into one Jacobian sum
+    def __init__(self, tables):
+        self.tables = tables
+        self.curve = tables[0].curve
+
+    def pow(self, exponents):
+        result = INFINITY
+        for table, e in zip(self.tables, exponents):
+            result = table.add_to(result, e)
+        return self.curve.encode(self.curve.to_affine(result))
@@ -0,0 +1,7 @@
+from functools import lru_cache
+from dotenv import load_dotenv
+
+@lru_cache(maxsize=None)
+def load_env():
+    # .env is only read once per process, variables that are already set are kept
+    load_dotenv()
@@ -0,0 +1,53 @@
+from shared.arithmetic import from_backend, powmod, to_backend
+
+class FixedBaseExp:
+    # precomputed windowed table for a fixed base g modulo p
+    #
+    # table[i][d] = g^(d * 2^(window * i)) mod p, so g^e is the product of one
+    # table entry per window of e and no squarings are needed at all
+    #
+    # the table is kept in the arithmetic backend's numbers, pow() returns a plain int
+    def __init__(self, g, p, max_bits=None, window=5):
+        if max_bits is None:
+            max_bits = p.bit_length()
+
+        self.g = g
+        self.p = p
+        self.window = window
+        self.max_bits = max_bits
+        self.mask = (1 << window) - 1
+        self.table = []
+
+        # p as a backend number for the reductions
+        self.modulus = to_backend(p)
+        p = self.modulus
+
+        base = to_backend(g) % p
+        for _ in range((max_bits + window - 1) // window):
+            row = [1, base]
+            for _ in range(2, 1 << window):
+                row.append(row[-1] * base % p)
+            self.table.append(row)
+
+            # base^(2^window) starts the next row
+            base = row[-1] * base % p
+
+    def pow(self, e):
+        p = self.modulus
+
+        # exponents outside the precomputed range fall back to a plain modular exponentiation
+        if e < 0 or e.bit_length() > self.max_bits:
+            return powmod(self.g, e, self.p)
+
+        result = 1
+        window = self.window
+        mask = self.mask
+        for row in self.table:
+            if not e:
+                break
+            d = e & mask
+            if d:
+                result = result * row[d] % p
+            e >>= window
+
+        return from_backend(result)
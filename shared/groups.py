@@ -0,0 +1,134 @@
+import os
+import json
+from functools import lru_cache
+from shared.env import load_env
+from shared.arithmetic import powmod
+from shared.fixed_base import FixedBaseExp
+from shared.multiexp import FixedBaseMultiExp, batch_check
+from shared.curves import CURVES, Curve, CurveFixedBase, CurveMultiExp
+
+# process-wide registry of the groups the protocols run in: the RFC 3526 MODP groups in
+# primes.json and the prime-order elliptic curves in curves.py. Every group is built the first
+# time it is asked for and then shared by all protocol instances
+#
+# both kinds have the same interface, and their elements and exponents are plain ints (an
+# element of a curve group is its compressed point encoding), so the provers, verifiers, PRFs,
+# adversaries and transcript stores do not depend on the kind of group; group operations are
+# written multiplicatively (g^e) for both
+
+class Group:
+    # MODP group: p, q = (p - 1) / 2, g and everything derived from them that does not depend on a key
+    name = "modp"
+
+    def __init__(self, bit_number, p, g):
+        self.bit_number = bit_number
+        self.p = p
+        self.q = (p - 1) // 2
+        self.g = g
+        self.params = (self.p, self.q, self.g)
+
+        # bytes needed for a value mod p, and the PRF input / output width of the variants
+        self.byte_length = (p.bit_length() + 7) // 8
+        self.prf_length = bit_number // 8
+
+        # fixed-base table for g, shared by the provers, verifiers and commitment pools of all instances
+        self.g_table = FixedBaseExp(g, p)
+
+    def __reduce__(self):
+        # process pools get the parameters and rebuild the table on their side
+        return Group, (self.bit_number, self.p, self.g)
+
+    def fixed_base(self, base, max_bits=None):
+        return FixedBaseExp(base, self.p, max_bits)
+
+    def multi_exp(self, tables):
+        return FixedBaseMultiExp(tables)
+
+    def reduce(self, element):
+        # canonical form of a received element
+        return element % self.p
+
+    def reduce_exponent(self, value):
+        # a PRF output as an exponent for g_table (the stateful nonce chain reduces mod p)
+        return value % self.p
+
+    def is_element(self, element):
+        # 1 <= A <= p - 1 and A ^ q = 1 mod p
+        return 1 <= element <= self.p - 1 and powmod(element, self.q, self.p) == 1
+
+    def batch_check(self, A, transcripts, validate_one, security_bits=64):
+        return batch_check(self.p, self.q, self.g_table, A, transcripts, validate_one, security_bits)
+
+class CurveGroup:
+    # prime-order elliptic curve group; params are (field prime, group order, encoded generator)
+    def __init__(self, name):
+        self.name = name
+        self.curve = Curve(name, **CURVES[name])
+        self.p = self.curve.p
+        self.q = self.curve.n
+        self.g = self.curve.encode(self.curve.generator)
+        self.params = (self.p, self.q, self.g)
+        self.bit_number = self.q.bit_length()
+
+        # an encoded point is one prefix byte and x; the PRF input / output is the encoding
+        # padded to whole AES blocks, so the stateful chain's x bit (the last input byte) changes
+        # a full output block and not just the one byte of a 33-byte output
+        self.byte_length = self.curve.field_length + 1
+        self.prf_length = (self.byte_length + 15) // 16 * 16
+
+        self.g_table = CurveFixedBase(self.curve, self.g)
+
+    def __reduce__(self):
+        return get_curve, (self.name,)
+
+    def fixed_base(self, base, max_bits=None):
+        return CurveFixedBase(self.curve, base, max_bits)
+
+    def multi_exp(self, tables):
+        return CurveMultiExp(tables)
+
+    def reduce(self, element):
+        # encodings are canonical already
+        return element
+
+    def reduce_exponent(self, value):
+        return value % self.q
+
+    def is_element(self, element):
+        # the curve has prime order, so every point but the point at infinity generates it
+        return element != 0 and self.curve.decode(element) is not None
+
+    def batch_check(self, A, transcripts, validate_one, security_bits=64):
+        # the small-exponent batch test would have to decompress every commitment first, which
+        # costs about as much as verifying it with the fixed-base tables, so the transcripts are
+        # verified one by one; returns the index of the first invalid transcript, or None
+        for index, transcript in enumerate(transcripts):
+            if not validate_one(*transcript):
+                return index
+        return None
+
+@lru_cache(maxsize=None)
+def load_primes(filename='primes.json'):
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+@lru_cache(maxsize=None)
+def get_group(bit_number, filename='primes.json'):
+    data = load_primes(filename)
+    p = int(data[f'bit_{bit_number}'].replace(' ', ''), 16)
+    return Group(bit_number, p, data['generator'])
+
+@lru_cache(maxsize=None)
+def get_curve(name):
+    return CurveGroup(name)
+
+def default_bit_number():
+    load_env()
+    return int(os.getenv('BIT_NUMBER')) # type: ignore
+
+def default_group():
+    # GROUP picks a curve from curves.py (e.g. p256), or modp (the default) for the
+    # primes.json group of BIT_NUMBER
+    load_env()
+    name = os.getenv('GROUP', 'modp')
+    return get_group(default_bit_number()) if name == 'modp' else get_curve(name)
@@ -0,0 +1,95 @@
+import json
+import functools
+from time import perf_counter_ns
+from collections import defaultdict
+import numpy as np
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    __slots__ = ("instrument", "name", "start")
+
+    def __init__(self, instrument, name):
+        self.instrument = instrument
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrument.record(self.name, perf_counter_ns() - self.start)
+        return False
+
+class Instrument:
+    # per-phase durations in nanoseconds (commitment, prf, challenge, response, validate, round);
+    # a disabled instrument records nothing and its spans are a shared no-op
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.durations = defaultdict(list)
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name, duration):
+        if self.enabled:
+            self.durations[name].append(duration)
+
+    def histogram(self, name):
+        # number of durations per power-of-two bucket, keyed by the bucket's lower bound in ns
+        durations = np.array(self.durations[name], dtype=np.int64)
+        if not len(durations):
+            return {}
+        buckets = np.bincount(np.floor(np.log2(np.maximum(durations, 1))).astype(int))
+        return {int(2 ** i): int(count) for i, count in enumerate(buckets) if count}
+
+    def summary(self):
+        summary = {}
+        for name, durations in self.durations.items():
+            durations = np.array(durations, dtype=np.int64)
+            summary[name] = {
+                "n": len(durations),
+                "mean_ns": float(durations.mean()),
+                "p50_ns": float(np.percentile(durations, 50)),
+                "p99_ns": float(np.percentile(durations, 99)),
+                "min_ns": int(durations.min()),
+                "max_ns": int(durations.max()),
+            }
+        return summary
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "summary": self.summary(),
+                "histograms": {name: self.histogram(name) for name in self.durations},
+                "durations_ns": self.durations,
+            }, f)
+
+# shared default for everything that is not instrumented
+DISABLED = Instrument(enabled=False)
+
+def phase(name):
+    # records every call of the decorated method as a span of its object's instrument
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            instrument = self.instrument
+            if not instrument.enabled:
+                return method(self, *args, **kwargs)
+
+            start = perf_counter_ns()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                instrument.record(name, perf_counter_ns() - start)
+        return wrapper
+    return decorate
@@ -0,0 +1,149 @@
+import secrets
+from shared.arithmetic import from_backend, powmod, to_backend
+
+def multi_pow(bases, exponents, p, window=4):
+    # simultaneous exponentiation (Straus): prod(b_i ^ e_i) mod p with one
+    # shared chain of squarings and interleaved windows over all exponents
+    mask = (1 << window) - 1
+    p = to_backend(p)
+    tables = []
+    for base in bases:
+        row = [1, to_backend(base) % p]
+        for _ in range(2, 1 << window):
+            row.append(row[-1] * row[1] % p)
+        tables.append(row)
+
+    bits = max((e.bit_length() for e in exponents), default=0)
+    result = 1
+    for i in reversed(range((bits + window - 1) // window)):
+        if result != 1:
+            for _ in range(window):
+                result = result * result % p
+
+        shift = i * window
+        for row, e in zip(tables, exponents):
+            d = (e >> shift) & mask
+            if d:
+                result = result * row[d] % p
+
+    return from_backend(result)
+
+class FixedBaseMultiExp:
+    # prod(b_i ^ e_i) mod p for bases known in advance (g and A of a verifier), from one
+    # FixedBaseExp table per base: every window of every exponent is one table lookup into
+    # a single shared product, so there are no squarings and one conversion at the end
+    #
+    # an exponent outside the range of its table falls back to a plain exponentiation
+    def __init__(self, tables):
+        self.tables = tables
+        self.p = tables[0].p
+        self.modulus = tables[0].modulus
+
+    def pow(self, exponents):
+        p = self.modulus
+        result = 1
+        for table, e in zip(self.tables, exponents):
+            if e < 0 or e.bit_length() > table.max_bits:
+                result = result * to_backend(powmod(table.g, e, table.p)) % p
+                continue
+
+            window = table.window
+            mask = table.mask
+            for row in table.table:
+                if not e:
+                    break
+                d = e & mask
+                if d:
+                    result = result * row[d] % p
+                e >>= window
+
+        return from_backend(result)
+
+def jacobi(a, n):
+    # Jacobi symbol (a / n) for odd n > 0, computed without exponentiation
+    a %= n
+    result = 1
+    while a:
+        shift = (a & -a).bit_length() - 1
+        a >>= shift
+        if shift & 1 and n & 7 in (3, 5):
+            result = -result
+        if a & n & 2:
+            result = -result
+        a, n = n % a, a
+    return result if n == 1 else 0
+
+def transcript_columns(transcripts):
+    # (ts, cs, zs) lists of ints; a transcript container with int_columns (the stateless
+    # TranscriptArray and its views) decodes its byte columns without building (t, c, z) tuples
+    if hasattr(transcripts, "int_columns"):
+        return transcripts.int_columns()
+    if not transcripts:
+        return [], [], []
+    return tuple(list(column) for column in zip(*transcripts))
+
+def batch_holds(p, q, g_table, A, columns, start, end, security_bits=64):
+    # small-exponent batch test of transcripts start .. end - 1: with random delta_i, check
+    # prod(t_i ^ delta_i) == g^(sum delta_i * z_i) * A^(sum delta_i * c_i) mod p
+    #
+    # g and A are both of order q, so the exponents on the right can be reduced mod q
+    #
+    # the deltas come from secrets, the random module is seeded by the campaigns and predictable
+    ts, cs, zs = columns
+    deltas = [secrets.randbelow(pow(2, security_bits) - 1) + 1 for _ in range(start, end)]
+
+    z_sum = 0
+    c_sum = 0
+    for delta, c, z in zip(deltas, cs[start:end], zs[start:end]):
+        z_sum += delta * z
+        c_sum += delta * c
+
+    left = multi_pow(ts[start:end], deltas, p)
+    right = g_table.pow(z_sum % q) * powmod(A, c_sum % q, p) % p
+    return left == right
+
+def first_invalid(p, q, g_table, A, columns, end, validate_one, security_bits=64):
+    # index of the first invalid transcript before end, or None if all are valid; every t must
+    # be in the order-q subgroup already
+    #
+    # binary search for the first failing transcript, individual checks at the leaves
+    ts, cs, zs = columns
+    pending = [(0, end)]
+    while pending:
+        start, end = pending.pop()
+        if end - start == 1:
+            if not validate_one(ts[start], cs[start], zs[start]):
+                return start
+            continue
+
+        if end == start or batch_holds(p, q, g_table, A, columns, start, end, security_bits):
+            continue
+
+        middle = (start + end) // 2
+        # the left half is searched first so the lowest failing index is reported
+        pending.append((middle, end))
+        pending.append((start, middle))
+
+    return None
+
+def batch_check(p, q, g_table, A, transcripts, validate_one, security_bits=64):
+    # returns the index of the first invalid transcript, or None if all are valid
+    #
+    # the batch test is only sound for commitments inside the order-q subgroup;
+    # for a safe prime p = 2q + 1 that subgroup is exactly the quadratic residues,
+    # so membership is a Jacobi symbol instead of a full t^q exponentiation
+    columns = transcript_columns(transcripts)
+    ts, cs, zs = columns
+    if jacobi(g_table.g, p) != 1:
+        for index, transcript in enumerate(zip(ts, cs, zs)):
+            if not validate_one(*transcript):
+                return index
+        return None
+
+    for index, t in enumerate(ts):
+        if t % p == 0 or jacobi(t, p) != 1:
+            # transcript index is invalid, but one of the transcripts before it can be as well
+            first = first_invalid(p, q, g_table, A, columns, index, validate_one, security_bits)
+            return index if first is None else first
+
+    return first_invalid(p, q, g_table, A, columns, len(ts), validate_one, security_bits)
@@ -0,0 +1,20 @@
+import numpy as np
+
+# deterministic, independent seeds for the instances or shards of a run, derived from one seed
+# with NumPy's SeedSequence; a result does not depend on the worker process that computed it,
+# and instance i gets the same seed from every driver (campaign.py, the parallel.py modules)
+
+def child_seed(sequence):
+    return int.from_bytes(sequence.generate_state(4, dtype=np.uint32).tobytes(), 'big')
+
+def instance_seeds(seed, count):
+    # seeds for instance 0 .. count - 1
+    return [child_seed(child) for child in np.random.SeedSequence(seed).spawn(count)]
+
+def seed_stream(seed):
+    # the seeds of instance_seeds for instance 0, 1, 2, ... without a count
+    sequence = np.random.SeedSequence(seed)
+    index = 0
+    while True:
+        yield child_seed(np.random.SeedSequence(sequence.entropy, spawn_key=(index,)))
+        index += 1
@@ -0,0 +1,67 @@
+import hashlib
+
+# non-interactive (Fiat-Shamir) mode of the identification protocols: the verifier's random
+# challenge is replaced by a hash of the commitment, the public key and the message, so the
+# prover alone turns a message into a signature (t, z) with t = g^z * A^c
+#
+# the signer and verifier wrap the prover and verifier of a variant's interactive protocol, so
+# the commitments still come from that prover (fixed-base table, precomputed pairs, pool or
+# subverted nonces) and signatures are verified with the verifier's fixed-base tables and batch
+# check; a variant whose prover hands out its commitments differently overrides
+# Signer.commitment and Signer.precompute
+
+# as in the interactive protocols, so the verifier's table for A covers every challenge
+CHALLENGE_BITS = 128
+
+def signature_challenge(group, A, t, message):
+    # c = H(t || A || m) cut to CHALLENGE_BITS, t and A at the fixed width of the group's elements
+    width = group.byte_length
+    digest = hashlib.sha256(t.to_bytes(width, 'big') + A.to_bytes(width, 'big') + message).digest()
+    return int.from_bytes(digest[:CHALLENGE_BITS // 8], 'big')
+
+class Signer:
+    def __init__(self, prover):
+        self.prover = prover
+        self.group = prover.group
+        self.public_key = prover.public_key
+
+    def commitment(self):
+        return self.prover.prover_commitment()
+
+    def sign(self, message):
+        t = self.commitment()
+        c = signature_challenge(self.group, self.public_key, t, message)
+        return t, self.prover.prover_response(c)
+
+    def precompute(self, n):
+        # offline phase: the commitments of the next n signatures
+        self.prover.precompute(n)
+
+    def sign_batch(self, messages, precompute=True):
+        # signatures of all messages; with precompute the commitments of the whole batch are
+        # computed first, so signing a message only costs the hash and the response
+        if precompute:
+            self.precompute(len(messages))
+        return [self.sign(message) for message in messages]
+
+class SignatureVerifier:
+    def __init__(self, verifier):
+        self.verifier = verifier
+        self.group = verifier.group
+        self.public_key = verifier.public_key
+
+    def transcripts(self, messages, signatures):
+        # the (t, c, z) transcripts of the signatures, as the interactive protocol would have produced them
+        return [(t, signature_challenge(self.group, self.public_key, t, message), z) for message, (t, z) in zip(messages, signatures)]
+
+    def verify(self, message, signature):
+        if not self.verifier.check_public_key():
+            return False
+
+        t, z = signature
+        return self.verifier.verify(t, signature_challenge(self.group, self.public_key, t, message), z)
+
+    def verify_batch(self, messages, signatures, security_bits=64):
+        # verify many signatures at once with the verifier's batch check, returns
+        # (valid, index of the first invalid signature)
+        return self.verifier.validate_batch(self.transcripts(messages, signatures), security_bits)
@@ -0,0 +1,212 @@
+import os
+import time
+import random
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# asyncio transport for concurrent identification sessions over local TCP or a Unix socket,
+# shared by the variants; a variant plugs in its prover and verifier as factories (picklable,
+# e.g. functools.partial of the class, since the workers build their own verifier) and the
+# challenge call of its verifier
+#
+# wire encoding: every message is one frame of a 1-byte kind, a 2-byte big-endian payload
+# length and the value as a minimal big-endian integer
+COMMITMENT = b"T"
+CHALLENGE = b"C"
+RESPONSE = b"Z"
+RESULT = b"R"
+
+def encode_frame(kind, value):
+    payload = value.to_bytes((value.bit_length() + 7) // 8, 'big')
+    return kind + len(payload).to_bytes(2, 'big') + payload
+
+async def read_frame(reader, expected):
+    header = await reader.readexactly(3)
+    if header[:1] != expected:
+        raise ConnectionError(f"expected a {expected!r} frame, got {header[:1]!r}")
+    payload = await reader.readexactly(int.from_bytes(header[1:], 'big'))
+    return int.from_bytes(payload, 'big')
+
+def honest_challenge(verifier, bits, t):
+    # the challenge of an honest verifier does not depend on the commitment
+    return verifier.challenge(bits)
+
+# exponentiations run in a process pool so the event loop stays responsive, every worker
+# sets up its fixed-base table and verifier (with the public key checked once) in init_worker
+worker_table = None
+worker_verifier = None
+
+def init_worker(group, new_verifier):
+    global worker_table, worker_verifier
+    # a forked worker starts with the parent's RNG state, so it has to be reseeded
+    random.seed()
+    worker_table = group.g_table
+    worker_verifier = new_verifier()
+
+def worker_validate(t, c, z):
+    return worker_verifier.check_public_key() and worker_verifier.verify(t, c, z)
+
+def worker_commitment(q):
+    r = random.randint(1, q - 1)
+    return r, worker_table.pow(r)
+
+class VerifierServer:
+    # new_verifier builds the verifier of a session, challenge(verifier, bits, t) asks it for
+    # the challenge of commitment t
+    def __init__(self, new_verifier, executor, challenge=honest_challenge, challenge_bits=128):
+        self.new_verifier = new_verifier
+        self.executor = executor
+        self.challenge = challenge
+        self.challenge_bits = challenge_bits
+        self.server = None
+        self.handlers = set()
+
+        self.sessions = 0
+        self.rounds = 0
+        self.failures = 0
+
+    async def handle(self, reader, writer):
+        # one verifier per session, a session runs rounds until the prover closes the connection
+        verifier = self.new_verifier()
+        loop = asyncio.get_running_loop()
+        self.sessions += 1
+        self.handlers.add(asyncio.current_task())
+
+        try:
+            while True:
+                try:
+                    t = await read_frame(reader, COMMITMENT)
+                except asyncio.IncompleteReadError as error:
+                    # the prover closed the connection between two rounds
+                    if not error.partial:
+                        break
+                    raise
+
+                c = self.challenge(verifier, self.challenge_bits, t)
+                writer.write(encode_frame(CHALLENGE, c))
+                await writer.drain()
+
+                z = await read_frame(reader, RESPONSE)
+                valid = await loop.run_in_executor(self.executor, worker_validate, t, c, z)
+                writer.write(encode_frame(RESULT, int(valid)))
+                await writer.drain()
+
+                self.rounds += 1
+                self.failures += not valid
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # a dropped or malformed connection only ends its own session, the round it was in
+            # counts as failed
+            self.rounds += 1
+            self.failures += 1
+        finally:
+            writer.close()
+            self.handlers.discard(asyncio.current_task())
+
+    async def start(self, address, backlog=1024):
+        # address is a Unix socket path or a (host, port) pair
+        if isinstance(address, str):
+            self.server = await asyncio.start_unix_server(self.handle, address, backlog=backlog)
+        else:
+            self.server = await asyncio.start_server(self.handle, *address, backlog=backlog)
+        return self.server
+
+    async def close(self):
+        # stop accepting and let the open sessions see their prover's end of stream
+        self.server.close()
+        await asyncio.gather(*self.handlers)
+        await self.server.wait_closed()
+
+async def open_connection(address):
+    if isinstance(address, str):
+        return await asyncio.open_unix_connection(address)
+    return await asyncio.open_connection(*address)
+
+async def prover_session(prover, address, executor, rounds, latencies):
+    # one identification session of rounds rounds, the latency of every round is recorded
+    p, q, g = prover.protocol
+    loop = asyncio.get_running_loop()
+    reader, writer = await open_connection(address)
+    valid = True
+
+    try:
+        for _ in range(rounds):
+            start_time = time.perf_counter()
+
+            prover.r, t = await loop.run_in_executor(executor, worker_commitment, q)
+            writer.write(encode_frame(COMMITMENT, t))
+            await writer.drain()
+
+            c = await read_frame(reader, CHALLENGE)
+            writer.write(encode_frame(RESPONSE, prover.prover_response(c)))
+            await writer.drain()
+
+            valid = bool(await read_frame(reader, RESULT)) and valid
+            latencies.append(time.perf_counter() - start_time)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+    return valid
+
+async def run_load(group, new_prover, new_verifier, worker_verifier=None, challenge=honest_challenge,
+                   sessions=1000, rounds=1, concurrency=512, workers=None, address=("127.0.0.1", 0)):
+    # runs sessions identification sessions against one verifier server, at most concurrency at
+    # the same time, and reports throughput and latency percentiles; the workers validate with
+    # worker_verifier (new_verifier if None)
+    latencies = []
+
+    initargs = (group, worker_verifier or new_verifier)
+    with ProcessPoolExecutor(workers or os.cpu_count(), initializer=init_worker, initargs=initargs) as executor:
+        # start the worker processes before any socket is open, forked workers would otherwise
+        # inherit the session sockets and keep them open after the prover closes its end
+        executor.submit(os.getpid).result()
+
+        server = VerifierServer(new_verifier, executor, challenge)
+        listener = await server.start(address, backlog=concurrency)
+        if not isinstance(address, str):
+            address = listener.sockets[0].getsockname()[:2]
+
+        limit = asyncio.Semaphore(concurrency)
+
+        async def session():
+            async with limit:
+                return await prover_session(new_prover(), address, executor, rounds, latencies)
+
+        start_time = time.perf_counter()
+        results = await asyncio.gather(*[session() for _ in range(sessions)])
+        total_time = time.perf_counter() - start_time
+
+        await server.close()
+
+    latencies = np.array(latencies)
+    return {
+        "sessions": sessions,
+        "rounds": len(latencies),
+        "failed_sessions": results.count(False),
+        "throughput": len(latencies) / total_time,
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p99": float(np.percentile(latencies, 99)),
+        "latency_max": float(latencies.max()),
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="concurrent identification sessions over local sockets")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=1, help="rounds per session")
+    parser.add_argument("--concurrency", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--unix", default=None, help="Unix socket path instead of local TCP")
+    return parser.parse_args()
+
+def main(run_load, new_protocol):
+    # command line of a variant's transport.py: run_load(protocol, sessions, rounds, concurrency,
+    # workers, address) is the variant's coroutine, new_protocol creates the protocol instance
+    args = parse_args()
+    protocol = new_protocol()
+    address = args.unix if args.unix else ("127.0.0.1", 0)
+    results = asyncio.run(run_load(protocol, args.sessions, args.rounds, args.concurrency, args.workers, address))
+
+    for key, value in results.items():
+        print(key + ":", value)
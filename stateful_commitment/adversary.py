@@ -1,12 +1,83 @@
-from aes_prf import aes_prf
+import os
+from concurrent.futures import ProcessPoolExecutor
+from aes_prf import aes_prf, aes_prf_batch
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.arithmetic import powmod
+from shared.groups import Group
+
+def recover_bits(backdoor_key, group, ts):
+    # the x bit behind every consecutive pair (ts[i], ts[i + 1]): ts[i + 1] = g^(PRF(ts[i], x_bit))
+    # with the PRF output reduced as in the nonce chain, None where neither candidate matches
+    #
+    # a pair only depends on its own two t values, so any slice of the chain can be recovered on its own;
+    # the x_bit = 1 candidate is only computed and checked for the pairs where x_bit = 0 did not match
+    g_table = group.g_table
+    r_ts, next_ts = ts[:-1], ts[1:]
+    bits = [None] * len(r_ts)
+
+    retry = []
+    for i, candidate in enumerate(aes_prf_batch(backdoor_key, r_ts, 0, group.prf_length)):
+        if g_table.pow(group.reduce_exponent(candidate)) == next_ts[i]:
+            bits[i] = 0
+        else:
+            retry.append(i)
+
+    if retry:
+        candidates = aes_prf_batch(backdoor_key, [r_ts[i] for i in retry], 1, group.prf_length)
+        for i, candidate in zip(retry, candidates):
+            if g_table.pow(group.reduce_exponent(candidate)) == next_ts[i]:
+                bits[i] = 1
+
+    return bits
+
+# backdoor key and group (with its fixed-base table) of a recovery worker, set up once by init_worker
+worker_key = None
+worker_group = None
+
+def init_worker(backdoor_key, group):
+    global worker_key, worker_group
+    worker_key = backdoor_key
+    worker_group = group
+
+def worker_recover_bits(ts):
+    return recover_bits(worker_key, worker_group, ts)
 
 class Adversary:
     def __init__(self, protocol, backdoor_key):
         self.protocol = protocol
         self.backdoor_key = backdoor_key
 
-    def obtain_secret(self, transcripts):
-        # Access protocol parameters
+    def obtain_secret(self, transcripts, workers=None, chunk_size=64):
+        # the pairs of consecutive transcripts are split into chunks of chunk_size pairs that are
+        # recovered on a process pool of workers processes (all cores by default); short chains,
+        # and workers=1, are recovered in this process
+        p, q, g = self.protocol.params
+        ts = [t for t, c, r in transcripts]
+        if len(ts) < 2:
+            return []
+
+        workers = workers or os.cpu_count()
+        # consecutive chunks share one t, the last t of a chunk starts the next one
+        chunks = [ts[start:start + chunk_size + 1] for start in range(0, len(ts) - 1, chunk_size)]
+
+        group = getattr(self.protocol, "group", None) or Group(p.bit_length(), p, g)
+        if workers == 1 or len(chunks) < 2:
+            results = [recover_bits(self.backdoor_key, group, chunk) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(min(workers, len(chunks)), initializer=init_worker, initargs=(self.backdoor_key, group)) as pool:
+                results = list(pool.map(worker_recover_bits, chunks))
+
+        # pairs where neither candidate matched leak nothing
+        x_bits = [bit for bits in results for bit in bits if bit is not None]
+
+        # secret_key = int(''.join(map(str, x_bits)), 2)
+        secret_key = x_bits
+
+        return secret_key
+
+    def obtain_secret_serial(self, transcripts):
+        # reference recovery, one transcript after the other with two full exponentiations at most
+        # (MODP groups only)
         p, q, g = self.protocol.params
 
         # collection of x_bits
@@ -26,9 +97,9 @@ class Adversary:
                 for x_bit in [0, 1]:
                     # calculate the t value for the given x_bit
                     t_candidate = aes_prf(self.backdoor_key, r_t, x_bit, p.bit_length() // 8)
-                    
+
                     # if calculated t value matches the collected t value
-                    if pow(g, t_candidate % p, p) == t:
+                    if powmod(g, t_candidate % p, p) == t:
                         x_bits.append(x_bit)
                         r_t = t
                         break
@@ -37,4 +108,3 @@ class Adversary:
         secret_key = x_bits
 
         return secret_key
-    
\ No newline at end of file
@@ -1,5 +1,7 @@
+from functools import lru_cache
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad
+import numpy as np
 
 def int_to_bytes(x, size):
     return x.to_bytes(size, 'big')
@@ -29,3 +31,74 @@ def aes_prf(key, r_t, x_bit, output_length=16):
     encrypted_int = int.from_bytes(encrypted_bytes[:output_length], 'big')
 
     return encrypted_int
+
+
+@lru_cache(maxsize=None)
+def ecb_cipher(key):
+    # one cached ECB cipher per key, CBC chaining is done by hand on top of it
+    return AES.new(key, AES.MODE_ECB)
+
+def aes_prf_cached(key, r_t, x_bit, output_length=16):
+    # same output as aes_prf, but CBC with a zero IV is done by hand on the cached ECB cipher
+    # of key, so no cipher is set up per call; only the blocks that are returned are encrypted
+    r_t_bytes = bytearray(r_t.to_bytes(output_length, 'big'))
+    r_t_bytes[-1] ^= x_bit
+    padded_data = pad(bytes(r_t_bytes), 16)
+
+    cipher = ecb_cipher(key)
+    previous = 0
+    encrypted_bytes = bytearray()
+    for j in range(0, output_length, 16):
+        block = int.from_bytes(padded_data[j:j + 16], 'big') ^ previous
+        encrypted_block = cipher.encrypt(block.to_bytes(16, 'big'))
+        previous = int.from_bytes(encrypted_block, 'big')
+        encrypted_bytes += encrypted_block
+
+    return int.from_bytes(encrypted_bytes[:output_length], 'big')
+
+def int_rows(values, width):
+    # values as an (n, width) uint8 array of big-endian rows; 2D uint8 arrays are used as they are
+    if isinstance(values, np.ndarray) and values.dtype == np.uint8 and values.ndim == 2:
+        if values.shape[1] == width:
+            return values
+        rows = np.zeros((values.shape[0], width), dtype=np.uint8)
+        rows[:, width - values.shape[1]:] = values
+        return rows
+
+    data = b"".join(int(value).to_bytes(width, 'big') for value in values)
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+
+def cbc_encrypt_rows(key, rows, n_blocks):
+    # CBC with a zero IV applied to every row on its own, but with one ECB call per block column
+    # only the first n_blocks blocks of each row are encrypted
+    cipher = ecb_cipher(key)
+    n = rows.shape[0]
+    encrypted = np.empty((n, n_blocks * 16), dtype=np.uint8)
+    previous = np.zeros((n, 16), dtype=np.uint8)
+
+    for j in range(n_blocks):
+        block = np.ascontiguousarray(rows[:, j * 16:(j + 1) * 16] ^ previous)
+        previous = np.frombuffer(cipher.encrypt(block.tobytes()), dtype=np.uint8).reshape(n, 16)
+        encrypted[:, j * 16:(j + 1) * 16] = previous
+
+    return encrypted
+
+def pad_rows(rows):
+    # PKCS#7 padding of every row, same as Crypto.Util.Padding.pad
+    pad_length = 16 - rows.shape[1] % 16
+    padded = np.full((rows.shape[0], rows.shape[1] + pad_length), pad_length, dtype=np.uint8)
+    padded[:, :rows.shape[1]] = rows
+    return padded
+
+# batch version of aes_prf: r_ts is a list of ints or an (n, output_length) uint8 array and
+# x_bits a single bit or one bit per r_t, returns the PRF outputs as a NumPy array of ints
+def aes_prf_batch(key, r_ts, x_bits, output_length=16):
+    r_t_bytes = int_rows(r_ts, output_length).copy()
+
+    # XOR the x_bit with the last byte of every r_t
+    r_t_bytes[:, -1] ^= np.asarray(x_bits, dtype=np.uint8)
+
+    padded_data = pad_rows(r_t_bytes)
+    encrypted_bytes = cbc_encrypt_rows(key, padded_data, (output_length + 15) // 16)[:, :output_length]
+
+    return np.array([int.from_bytes(row.tobytes(), 'big') for row in encrypted_bytes], dtype=object)
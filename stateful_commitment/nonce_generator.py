@@ -0,0 +1,107 @@
+import json
+import os
+import random
+from aes_prf import aes_prf_cached
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.instrumentation import DISABLED
+
+def load_checkpoints(path):
+    # (current state, checkpoints by round) of a file written by NonceGenerator.save
+    with open(path, "r") as f:
+        data = json.load(f)
+    return data["state"], {state["round"]: state for state in data["checkpoints"]}
+
+class NonceGenerator:
+    # the subverted prover's nonce chain: the first r is random, every later one is
+    # PRF(t of the previous round, x bit sigma) reduced by group.reduce_exponent (mod p for the
+    # MODP groups, mod q for the curves), with sigma walking over the bits of x
+    #
+    # the whole chain state is (round, r_t, sigma, RNG state), so it can be checkpointed,
+    # saved to disk and restored; with checkpoint_every set, a checkpoint is kept every
+    # checkpoint_every rounds and seek() replays from the closest one instead of round 0
+    def __init__(self, group, backdoor_key, x_bits, seed=None, checkpoint_every=None, instrument=None):
+        self.group = group
+        self.q = group.q
+        self.g_table = group.g_table
+        self.bd_key = backdoor_key
+        self.x_bits = x_bits
+
+        # the PRF runs on the encoding of t and its output is as long as that encoding
+        self.output_length = group.prf_length
+        self.instrument = instrument if instrument is not None else DISABLED
+
+        # without a seed the RNG is seeded from the global one, so a seeded run stays reproducible
+        self.rng = random.Random(random.getrandbits(64) if seed is None else seed)
+
+        self.round = 0
+        self.r_t = None
+        self.sigma = 0
+
+        self.checkpoint_every = checkpoint_every
+        self.checkpoints = {}
+        if checkpoint_every:
+            self.checkpoints[0] = self.checkpoint()
+
+    def next(self):
+        # r and t = g^r of the next round
+        if self.r_t is None:
+            r = self.rng.randint(1, self.q - 1)
+        else:
+            x_bit = self.x_bits[self.sigma % len(self.x_bits)]
+            with self.instrument.span("prf"):
+                prf_output = aes_prf_cached(self.bd_key, self.r_t, x_bit, self.output_length)
+            r = self.group.reduce_exponent(prf_output)
+        self.sigma = (self.sigma + 1) % len(self.x_bits)
+
+        t = self.g_table.pow(r)
+        self.r_t = t
+        self.round += 1
+
+        if self.checkpoint_every and self.round % self.checkpoint_every == 0:
+            self.checkpoints[self.round] = self.checkpoint()
+
+        return r, t
+
+    def checkpoint(self):
+        # JSON-serialisable state before round self.round
+        version, internal, gauss_next = self.rng.getstate()
+        return {
+            "round": self.round,
+            "r_t": self.r_t,
+            "sigma": self.sigma,
+            "rng_state": [version, list(internal), gauss_next],
+        }
+
+    def restore(self, state):
+        self.round = state["round"]
+        self.r_t = state["r_t"]
+        self.sigma = state["sigma"]
+        version, internal, gauss_next = state["rng_state"]
+        self.rng.setstate((version, tuple(internal), gauss_next))
+
+    def seek(self, n):
+        # moves to the state before round n, starting from the latest checkpoint at or before n
+        # when that is closer than the current round; every round in between costs one exponentiation
+        start = max((k for k in self.checkpoints if k <= n), default=None)
+        if n < self.round or (start is not None and start > self.round):
+            if start is None:
+                raise ValueError(f"no checkpoint at or before round {n}")
+            self.restore(self.checkpoints[start])
+
+        while self.round < n:
+            self.next()
+
+    def save(self, path, state=None):
+        # state (the current one by default) and all checkpoints; written to a temporary file
+        # first, so a crash while saving leaves the previous file intact
+        data = {
+            "state": self.checkpoint() if state is None else state,
+            "checkpoints": list(self.checkpoints.values()),
+        }
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    def load(self, path):
+        state, self.checkpoints = load_checkpoints(path)
+        self.restore(state)
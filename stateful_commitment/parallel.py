@@ -0,0 +1,84 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.groups import default_group
+from shared.seeds import instance_seeds
+from subverted_schnorr import SchnorrIdentificationProtocol
+from adversary import Adversary
+from nonce_generator import load_checkpoints
+
+# every r depends on the previous t, so the rounds of one chain cannot be split up on their own;
+# instead independent protocol instances (each with its own secret key) run in parallel, and a
+# chain that was checkpointed before can be rerun in segments between its checkpoints
+
+def run_instance(seed, backdoor_key):
+    # every instance has its own RNG stream, so its result does not depend on the worker that runs it
+    random.seed(seed)
+
+    # without a shared backdoor key every instance gets its own
+    if backdoor_key is None:
+        backdoor_key = random.randbytes(32)
+
+    protocol = SchnorrIdentificationProtocol(backdoor_key)
+    result = protocol.simulate()
+    if result is None:
+        return None
+
+    transcripts, time_values = result
+    return protocol.secret_key, protocol.public_key, backdoor_key, transcripts, time_values
+
+def run_segment(backdoor_key, secret_key, state, stop):
+    # the rounds of one chain from the checkpoint state up to round stop (the end of the chain if None)
+    protocol = SchnorrIdentificationProtocol(backdoor_key, secret_key)
+    protocol.subverted_prover.restore(state)
+    return protocol.simulate(stop=stop)
+
+def simulate_segments(backdoor_key, secret_key, checkpoint_path, workers=None):
+    # reruns a chain whose checkpoints were saved to checkpoint_path (simulate with a checkpoint_path
+    # and checkpoint_every) with one segment between two consecutive checkpoints per task;
+    # returns (transcripts, time_values) of the whole chain in order, or None if a segment failed
+    workers = workers or os.cpu_count()
+    state, checkpoints = load_checkpoints(checkpoint_path)
+    starts = sorted(checkpoints)
+    stops = starts[1:] + [None]
+
+    with ProcessPoolExecutor(workers) as pool:
+        segments = list(pool.map(run_segment, [backdoor_key] * len(starts), [secret_key] * len(starts),
+                                 [checkpoints[start] for start in starts], stops))
+
+    if any(segment is None for segment in segments):
+        return None
+
+    transcripts = [transcript for segment_transcripts, _ in segments for transcript in segment_transcripts]
+    time_values = [value for _, segment_time_values in segments for value in segment_time_values]
+    return transcripts, time_values
+
+def simulate_instances(num_instances, workers=None, seed=None, backdoor_key=None):
+    # runs num_instances independent protocol instances on a process pool, returns one
+    # (secret_key, public_key, backdoor_key, transcripts, time_values) tuple per instance in order
+    workers = workers or os.cpu_count()
+    seeds = instance_seeds(seed, num_instances)
+
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(run_instance, seeds, [backdoor_key] * num_instances))
+
+def main():
+    start_time = time.perf_counter()
+    instances = simulate_instances(os.cpu_count())
+    print("Time: ", time.perf_counter() - start_time)
+
+    # the adversary only needs the group, which all instances share
+    group = default_group()
+
+    for secret_key, public_key, backdoor_key, transcripts, time_values in instances:
+        adversary = Adversary(SimpleNamespace(params=group.params, group=group), backdoor_key)
+        recovered_x = adversary.obtain_secret(transcripts)
+        recovered_x = recovered_x[:secret_key.bit_length()]
+        recovered_x = recovered_x[-1:] + recovered_x[:-1]
+        print("Recovered:", int("".join([str(bit) for bit in recovered_x]), 2) == secret_key)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# the code all variants share (groups, curves, arithmetic backend, fixed-base tables, batch
+# verification, commitment pool, instrumentation) is the shared package at the repository root;
+# a script of a variant directory only gets its own directory on sys.path, so the variant
+# modules import this module before anything from shared
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
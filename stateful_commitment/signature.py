@@ -0,0 +1,62 @@
+import os
+import time
+from subverted_schnorr import SchnorrIdentificationProtocol
+from adversary import Adversary
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.signature import Signer, SignatureVerifier
+
+# Fiat-Shamir signatures (see shared/signature.py) with the subverted prover: the commitments
+# of consecutive signatures form the backdoored nonce chain, exactly as in the interactive
+# attack; the adversary recovers x from the (t, c, z) transcripts of consecutive published
+# signatures
+
+class SubvertedSignatureScheme:
+    # key pair, signer and verifier on top of the subverted prover and the honest verifier
+    def __init__(self, backdoor_key, secret_key=None, instrument=None, seed=None, pool_size=None):
+        self.protocol = SchnorrIdentificationProtocol(backdoor_key, secret_key, instrument, seed, pool_size=pool_size)
+        self.group = self.protocol.group
+        self.params = self.protocol.params
+        self.secret_key = self.protocol.secret_key
+        self.public_key = self.protocol.public_key
+        self.bd_key = backdoor_key
+
+        self.signer = Signer(self.protocol.subverted_prover)
+        self.verifier = SignatureVerifier(self.protocol.honest_verifier)
+
+    def close(self):
+        self.protocol.close()
+
+def main():
+    backdoor_key = os.urandom(32)  # Use a random 32-byte key as the backdoor key
+
+    scheme = SubvertedSignatureScheme(backdoor_key)
+    adversary = Adversary(scheme.protocol, backdoor_key)
+
+    # as many consecutive signatures as the interactive attack has rounds
+    messages = [f"message {i}".encode() for i in range(scheme.protocol.num_rounds)]
+
+    start_time = time.perf_counter()
+    signatures = scheme.signer.sign_batch(messages)
+    sign_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    valid, index = scheme.verifier.verify_batch(messages, signatures)
+    verify_time = time.perf_counter() - start_time
+    scheme.close()
+    if not valid:
+        print("Verification failed")
+        return
+
+    recovered_x = adversary.obtain_secret(scheme.verifier.transcripts(messages, signatures))
+
+    # the chain starts at the second bit of x, so the last recovered bit is the first one
+    recovered_x = recovered_x[:scheme.secret_key.bit_length()]
+    recovered_x = recovered_x[-1:] + recovered_x[:-1]
+    recovered_x = int("".join([str(bit) for bit in recovered_x]), 2)
+
+    print("Signatures per second:", len(messages) / sign_time)
+    print("Verifications per second:", len(messages) / verify_time)
+    print("Recovered:", recovered_x == scheme.secret_key)
+
+if __name__ == "__main__":
+    main()
@@ -1,97 +1,178 @@
 import os
 import random
-import json
 import time
-from dotenv import load_dotenv
-from aes_prf import aes_prf
+from contextlib import nullcontext
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.groups import Group, default_group
+from shared.commitment_pool import CommitmentPool
+from nonce_generator import NonceGenerator
+from shared.instrumentation import DISABLED, phase
 from adversary import Adversary
 
-def hex_to_int(hex_str):
-    hex_str = hex_str.replace(' ', '')
-    return int(hex_str, 16)
-
-def load_data(filename):
-    with open(filename, 'r') as file:
-        data = json.load(file)
-    return data
-
 class SubvertedProver:
-    def __init__(self, p, q, g, x, A, backdoor_key, bit_number):
+    def __init__(self, p, q, g, x, A, backdoor_key, bit_number, group=None, instrument=None, nonces=None, pool=None):
         self.protocol = (p, q, g)
         self.secret_key = x
         self.x_bits = [int(bit) for bit in bin(x)[2:]]
         self.public_key = A
         self.r = None
-        self.r_t = None
-        self.sigma = 0
         self.bd_key = backdoor_key
         self.bit_number = bit_number
-
-    def calculate_r(self): 
-        p, q, g = self.protocol
-
-        if self.r_t is None:
-            self.r = random.randint(1, q - 1)
+        self.group = group if group is not None else Group(p.bit_length(), p, g)
+        self.g_table = self.group.g_table
+        self.instrument = instrument if instrument is not None else DISABLED
+
+        # the r chain with its cached cipher, can be checkpointed, restored and seeked
+        if nonces is None:
+            nonces = NonceGenerator(self.group, backdoor_key, self.x_bits, instrument=self.instrument)
+        self.nonces = nonces
+
+        # commitment pool fed by the chain (CommitmentPool with source=nonces.next), holds the
+        # next pairs of the chain in order; precompute() creates one without a refill thread
+        self.pool = pool
+
+        # round of the chain the next commitment belongs to, the chain itself is ahead of it by
+        # the pairs queued in the pool (a pool's refill thread starts as soon as it is created)
+        with self.chain_paused():
+            self.round = nonces.round - (len(pool.pairs) if pool is not None else 0)
+
+    def precompute(self, n):
+        # offline phase: the next n (r, t) pairs of the nonce chain into the pool; a pair only
+        # depends on the t before it and not on the challenges, so the chain can run ahead of
+        # the rounds
+        if self.pool is None:
+            p, q, g = self.protocol
+            self.pool = CommitmentPool(p, q, g, 0, group=self.group, source=self.nonces.next)
+        self.pool.fill(n)
+
+    @phase("commitment")
+    def prover_commitment(self):
+        if self.pool is not None:
+            self.r, t = self.pool.draw()
         else:
-            x_bit = self.x_bits[self.sigma % len(self.x_bits)]
-            prf_output = aes_prf(self.bd_key, self.r_t, x_bit, self.bit_number // 8)
-            self.r = prf_output % p
-        self.sigma = (self.sigma + 1) % len(self.x_bits)
+            self.r, t = self.nonces.next()
+        self.round += 1
+        return t
 
-        return self.r
+    def chain_paused(self):
+        # the pool does not advance the chain inside this block
+        return self.pool.paused() if self.pool is not None else nullcontext()
+
+    def seek(self, n):
+        # moves to round n of the chain; queued pairs of the rounds before n are skipped,
+        # going back drops them and restores the chain from a checkpoint (see NonceGenerator.seek)
+        with self.chain_paused():
+            if n < self.round or self.nonces.round == self.round:
+                if self.pool is not None:
+                    self.pool.clear()
+                self.nonces.seek(n)
+                self.round = n
+                return
 
-    def prover_commitment(self):
-        p, q, g = self.protocol
-        self.r = self.calculate_r()
-        t = pow(g, self.r, p)
-        self.r_t = t
-        return t
+        while self.round < n:
+            self.pool.draw()
+            self.round += 1
+
+    def restore(self, state):
+        with self.chain_paused():
+            if self.pool is not None:
+                self.pool.clear()
+            self.nonces.restore(state)
+            self.round = self.nonces.round
+
+    def load(self, path):
+        with self.chain_paused():
+            if self.pool is not None:
+                self.pool.clear()
+            self.nonces.load(path)
+            self.round = self.nonces.round
+
+    def save(self, path):
+        # saves the chain so that it resumes at the prover's next round; with pairs queued in
+        # the pool the chain is ahead of that round, so the checkpoint of the round is saved
+        # as its state
+        with self.chain_paused():
+            state = None
+            if self.round != self.nonces.round:
+                if self.round not in self.nonces.checkpoints:
+                    raise ValueError(f"no checkpoint at round {self.round}")
+                state = self.nonces.checkpoints[self.round]
+            self.nonces.save(path, state)
     
+    @phase("response")
     def prover_response(self, c):
         p, q, _ = self.protocol
         z = (self.r - c * self.secret_key) % q
         return z
     
 class HonestVerifier:
-    def __init__(self, p, q, g, A):
+    def __init__(self, p, q, g, A, group=None, instrument=None):
         self.protocol = (p, q, g)
         self.public_key = A
+        self.public_key_valid = None
         self.c = None
+        self.group = group if group is not None else Group(p.bit_length(), p, g)
+        self.g_table = self.group.g_table
+        self.multi_exp = None
+        self.instrument = instrument if instrument is not None else DISABLED
 
+    @phase("challenge")
     def challenge(self, bits):
         p, _, _ = self.protocol
         self.c = random.randint(1, pow(2, bits) - 1)
         return self.c
     
+    def check_public_key(self):
+        # A never changes, so the public key tests only run once
+        if self.public_key_valid is None:
+            # test if A is an element of the order-q group (for MODP: 1 <= A <= p - 1 and A ^ q = 1 mod p)
+            self.public_key_valid = self.group.is_element(self.public_key)
+
+        return self.public_key_valid
+
+    @phase("validate")
     def validate(self, t, z):
-        # test if A is in range 1 - (p - 1)
-        p, q, g = self.protocol
-        if self.public_key < 1 or self.public_key > p - 1:
-            return False
-        
-        # test if A ^ q = 1 mod p
-        if pow(self.public_key, q, p) != 1:
+        if not self.check_public_key():
             return False
 
-        # test if t = g^z * A^c mod p
-        left = t % p
-        right = (pow(g, z, p) * pow(self.public_key, self.c, p)) % p
+        return self.verify(t, self.c, z)
+
+    def verify(self, t, c, z):
+        # test if t = g^z * A^c in the group
+        left = self.group.reduce(t)
+        right = self.equation().pow((z, c))
         return left == right
+
+    def equation(self):
+        # g^z * A^c from fixed-base tables for g and A, A's table covers the 128-bit challenges;
+        # it is built on the first verification, after that a round costs no squarings
+        if self.multi_exp is None:
+            self.multi_exp = self.group.multi_exp([self.g_table, self.group.fixed_base(self.public_key, max_bits=128)])
+        return self.multi_exp
+
+    def validate_batch(self, transcripts, security_bits=64):
+        # verify many (t, c, z) transcripts at once, returns (valid, index of the first invalid transcript)
+        if not transcripts:
+            return True, None
+
+        if not self.check_public_key():
+            return False, 0
+
+        index = self.group.batch_check(self.public_key, transcripts, self.verify, security_bits)
+        return index is None, index
     
 class SchnorrIdentificationProtocol:
-    def __init__(self, backdoor_key):
-        load_dotenv()
-        bit_number = int(os.getenv('BIT_NUMBER')) # type: ignore
+    def __init__(self, backdoor_key, secret_key=None, instrument=None, seed=None, checkpoint_every=None, pool_size=None):
+        # group (MODP or curve, see groups.default_group) and the fixed-base table for g,
+        # shared by every instance in the process
+        self.group = default_group()
+        bit_number = self.group.bit_number
         self.num_rounds = bit_number + 1
+        p, q, g = self.group.params
+        self.g_table = self.group.g_table
 
-        # load the json data
-        data = load_data('primes.json')
-        p = hex_to_int(data[f'bit_{bit_number}'])
-        q = (p - 1) // 2
-        g = data['generator']
-
-        x = random.randint(1, q - 1)
-        A = pow(g, x, p)
+        x = random.randint(1, q - 1) if secret_key is None else secret_key
+        A = self.g_table.pow(x)
         self.params = (p, q, g)
         self.secret_key = x
         self.public_key = A
@@ -99,37 +180,84 @@ class SchnorrIdentificationProtocol:
         self.bd_key = backdoor_key
         self.counter = 0
 
-        self.subverted_prover = SubvertedProver(p, q, g, x, A, backdoor_key, bit_number)
-        self.honest_verifier = HonestVerifier(p, q, g, A)
-
-    def simulate(self):
-        
+        # per-phase timings of prover and verifier, off unless an enabled Instrument is passed
+        self.instrument = instrument if instrument is not None else DISABLED
+
+        # nonce chain of the prover, checkpointed every checkpoint_every rounds if set
+        self.nonces = NonceGenerator(self.group, backdoor_key, [int(bit) for bit in bin(x)[2:]], seed, checkpoint_every, self.instrument)
+
+        # optional pool that runs the chain ahead of the rounds in a background thread
+        self.pool = CommitmentPool(p, q, g, pool_size, group=self.group, source=self.nonces.next) if pool_size else None
+
+        self.subverted_prover = SubvertedProver(p, q, g, x, A, backdoor_key, bit_number, self.group, self.instrument, self.nonces, self.pool)
+        self.honest_verifier = HonestVerifier(p, q, g, A, self.group, self.instrument)
+
+    def simulate(self, batch_size=None, start=None, stop=None, checkpoint_path=None):
+        # with a batch_size, rounds are not verified one by one but in batches of
+        # batch_size transcripts, so the recorded round time excludes validation
+        #
+        # only rounds start .. stop - 1 of the chain are run (by default from the prover's
+        # current round to num_rounds); with a checkpoint_path the chain is first
+        # restored from that file if it exists, and saved to it at every new checkpoint,
+        # so an interrupted run can be resumed where it stopped
+        #
+        # time_values holds the wall time of every round in seconds, from the start of the
+        # commitment to the end of validation
         transcripts = []
         time_values = []
+        verified = 0
 
-        for _ in range(self.num_rounds):
-            start_time = time.time()
+        # the prover counts the rounds, pairs it precomputed are ahead of them in the chain
+        prover = self.subverted_prover
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            prover.load(checkpoint_path)
+        if start is not None:
+            prover.seek(start)
+        if stop is None:
+            stop = self.num_rounds
 
-            t = self.subverted_prover.prover_commitment()
+        while prover.round < stop:
+            start_time = time.perf_counter_ns()
 
-            total_time = time.time() - start_time
+            t = self.subverted_prover.prover_commitment()
 
             challenge_bits = 128 # number of bits in the challenge
             c = self.honest_verifier.challenge(challenge_bits)
             z = self.subverted_prover.prover_response(c)
-            valid = self.honest_verifier.validate(t, z)
+            valid = self.honest_verifier.validate(t, z) if batch_size is None else True
 
-            total_time = time.time() - start_time
-            time_values.append(total_time)
+            total_time = time.perf_counter_ns() - start_time
+            time_values.append(total_time / 1e9)
+            self.instrument.record("round", total_time)
 
             if not valid:
                 print("Verification failed")
                 return
 
             transcripts.append((t, c, z))
+            if checkpoint_path is not None and prover.round in self.nonces.checkpoints:
+                prover.save(checkpoint_path)
+
+            if batch_size is not None and len(transcripts) - verified >= batch_size:
+                valid, index = self.honest_verifier.validate_batch(transcripts[verified:])
+                if not valid:
+                    print("Verification failed")
+                    return
+                verified = len(transcripts)
+
+        if batch_size is not None and len(transcripts) > verified:
+            valid, index = self.honest_verifier.validate_batch(transcripts[verified:])
+            if not valid:
+                print("Verification failed")
+                return
 
         return transcripts, time_values
 
+    def close(self):
+        # stops the commitment pool's refill worker
+        if self.pool is not None:
+            self.pool.close()
+
 
     
 def main():
@@ -138,7 +266,7 @@ def main():
     protocol = SchnorrIdentificationProtocol(backdoor_key)
     adversary = Adversary(protocol, backdoor_key)
 
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     transcripts, time_values = protocol.simulate()
 
@@ -156,7 +284,7 @@ def main():
 
     print("Recovered secret key number:", recovered_x)
 
-    print("Time: ", time.time() - start_time)
+    print("Time: ", time.perf_counter() - start_time)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
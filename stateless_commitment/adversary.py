@@ -1,10 +1,11 @@
-from collections import defaultdict
 from types import SimpleNamespace
 import os
-from aes_prf import aes_prf
+from aes_prf import aes_prf, aes_prf_batch
 import numpy as np
 import uuid
-import base64
+import analysis
+from run_metadata import load_metadata, save_metadata
+from transcript_store import TranscriptRows, TranscriptWriter, TranscriptReader
 
 class Adversary:
     def __init__(self, protocol, backdoor_key):
@@ -16,22 +17,45 @@ class Adversary:
         return cls(None, None)
     
     def set_protocol(self, protocol):
-        self.protocol = SimpleNamespace(**protocol)
+        # a RunMetadata from load_attack, or a dict with the same keys
+        self.protocol = SimpleNamespace(**protocol) if isinstance(protocol, dict) else protocol
 
     def set_backdoor_key(self, backdoor_key):
         self.backdoor_key = backdoor_key
 
-    def obtain_secret(self, transcripts):
-        bit_counters = np.zeros(self.protocol.secret_key.bit_length(), dtype=int)
-
+    def prf_length(self):
+        # PRF input width of the protocol's group, the MODP width if the group is not known
         p, q, g = self.protocol.params
-
+        group = getattr(self.protocol, "group", None)
+        return group.prf_length if group is not None else p.bit_length() // 8
+
+    def evaluate_prf(self, transcripts, chunk_size=65536):
+        # yields the (l, b) arrays of the backdoor PRF for the t values, chunk_size transcripts at a time
+        x_length = self.protocol.secret_key.bit_length()
+        prf_length = self.prf_length()
+
+        # stored and in-memory transcript rows go to the PRF straight from their t column
+        if isinstance(transcripts, TranscriptRows):
+            t_rows = transcripts.column("t")
+            for start in range(0, len(transcripts), chunk_size):
+                yield aes_prf_batch(self.backdoor_key, t_rows[start:start + chunk_size], x_length, prf_length)
+            return
+
+        chunk = []
         for transcript in transcripts:
-            t, c, r = transcript
+            chunk.append(transcript[0])
+            if len(chunk) == chunk_size:
+                yield aes_prf_batch(self.backdoor_key, chunk, x_length, prf_length)
+                chunk = []
 
-            l, b = aes_prf(self.backdoor_key, t, self.protocol.secret_key.bit_length(), p.bit_length() // 8)
+        if chunk:
+            yield aes_prf_batch(self.backdoor_key, chunk, x_length, prf_length)
 
-            bit_counters[l] += (1 if b else -1)
+    def obtain_secret(self, transcripts):
+        bit_counters = np.zeros(self.protocol.secret_key.bit_length(), dtype=int)
+
+        for l, b in self.evaluate_prf(transcripts):
+            np.add.at(bit_counters, l, np.where(b == 1, 1, -1))
 
         # Recover the secret key by selecting the majority vote for each bit position
         recovered_secret_key = [1 if count > 0 else 0 for count in bit_counters]
@@ -42,98 +66,82 @@ class Adversary:
         bit_counters = np.zeros(self.protocol.secret_key.bit_length(), dtype=int)
         transcript_counters = np.zeros(self.protocol.secret_key.bit_length(), dtype=int)
 
-        p, q, g = self.protocol.params
-
-        for transcript in transcripts:
-            t, c, r = transcript
-
-            l, b = aes_prf(self.backdoor_key, t, self.protocol.secret_key.bit_length(), p.bit_length() // 8)
-
-            bit_counters[l] += (1 if b else -1)
-            transcript_counters[l] += 1
+        for l, b in self.evaluate_prf(transcripts):
+            np.add.at(bit_counters, l, np.where(b == 1, 1, -1))
+            transcript_counters += np.bincount(l, minlength=len(transcript_counters))
 
         # Recover the secret key by selecting the majority vote for each bit position
         recovered_secret_key = [1 if count > 0 else 0 for count in bit_counters]
 
         return recovered_secret_key, bit_counters, transcript_counters
     
-    def save_attack(self, transcripts, protocol, time_values):
-        # create a folder called "transcripts_randomId", save the transcripts to a file called "transcripts.txt" and save the protocol to a file called "protocol.txt"
-        
-        # 1. create a folder called "transcripts_randomId" with random uuid with maxximum 8 characters
+    def new_attack_folder(self):
+        # create a folder called "transcripts_randomId" with random uuid with maxximum 8 characters
         randomId = str(uuid.uuid4())[:8]
         folderName = "transcripts_" + randomId
         os.mkdir(folderName)
+        return folderName
+
+    def transcript_writer(self, folderName, protocol):
+        # streaming writer for folderName/transcripts.bin, t and z are as wide as an element of the group
+        return TranscriptWriter(folderName + "/transcripts.bin", protocol.group.byte_length)
+
+    def save_attack(self, transcripts, protocol, time_values, folderName=None):
+        # save the transcripts to a file called "transcripts.bin" and the protocol to a file called "protocol.txt"
+        # in folderName (a new "transcripts_randomId" folder by default); transcripts can be None if they were
+        # already streamed to the folder with transcript_writer during the simulation
+        #
+        # time.txt holds one round time in seconds per line, phases.json the per-phase timings
+
+        # 1. create a folder called "transcripts_randomId"
+        if folderName is None:
+            folderName = self.new_attack_folder()
+
+        # for the protocol, save bit_number, p, q, g, x, y and the backdoor key
+        save_metadata(folderName, protocol)
 
-        # for the protocol, save bit_number, p, q, g, x, y, backdoor_key, bit_number
-        with open(folderName + "/protocol.txt", "w") as f:
-            f.write("bit_number," + str(protocol.bit_number) + "\n")
-            f.write("p," + str(protocol.params[0]) + "\n")
-            f.write("q," + str(protocol.params[1]) + "\n")
-            f.write("g," + str(protocol.params[2]) + "\n")
-            f.write("x," + str(protocol.secret_key) + "\n")
-            f.write("y," + str(protocol.public_key) + "\n")
-            # f.write("bd_key," + str(protocol.bd_key) + "\n")
-            f.write("bd_key," + base64.b64encode(protocol.bd_key).decode("utf-8") + "\n")
-
-        with open(folderName + "/transcripts.txt", "w") as f:
-            for transcript in transcripts:
-                f.write(str(transcript) + "\n")
+        if transcripts is not None:
+            with self.transcript_writer(folderName, protocol) as writer:
+                writer.write_many(transcripts)
 
         with open(folderName + "/time.txt", "w") as f:
             for time_value in time_values:
                 f.write(str(time_value) + "\n")
 
+        # per-phase timings and histograms if the protocol ran with an enabled instrument
+        instrument = getattr(protocol, "instrument", None)
+        if instrument is not None and instrument.enabled:
+            instrument.save(folderName + "/phases.json")
+
     def load_attack(self, folder):
-        # 1. create an emtpy object in which to store the protocol parameters, transcripts and timevalues
-        protocol = defaultdict()
+        # 1. load the protocol parameters from the file "protocol.txt" in the folder, p, q and g
+        # are checked against the group registry (see run_metadata)
+        protocol = load_metadata(folder)
         transcripts = []
         time_values = []
 
-        protocol["params"] = [0, 0, 0]
-        protocol["secret_key"] = 0
-        protocol["public_key"] = 0
-
-        # 2. load the protocol parameters from the file "protocol.txt" in the folder
-        with open(folder + "/protocol.txt", "r") as f:
-            for line in f:
-                if "bd_key" in line:
-                    protocol["bd_key"] = base64.b64decode(line.strip().split(",")[1])
-                    continue
-                if "p" in line:
-                    protocol["params"][0] = int(line.strip().split(",")[1])
-                    continue
-                if "q" in line:
-                    protocol["params"][1] = int(line.strip().split(",")[1])
-                    continue
-                if "g" in line:
-                    protocol["params"][2] = int(line.strip().split(",")[1])
-                    continue
-                if "x" in line:
-                    protocol["secret_key"] = int(line.strip().split(",")[1])
-                    continue
-                if "y" in line:
-                    protocol["public_key"] = int(line.strip().split(",")[1])
-                    continue
-                line = line.strip().split(",")
-                protocol[line[0]] = int(line[1])
-
-        # 3. load the transcripts from the file "transcripts.txt" in the folder
-        with open(folder + "/transcripts.txt", "r") as f:
-            for line in f:
-                # the lines contain a list of 3 values, which are separated by ", "
-                # so remove the ( and ) and split by ", "
-                transcript = line.strip()[1:-1].split(", ")
-                # transcript = line.strip().split(", ")
-                transcript = [int(x) for x in transcript]
-                transcripts.append(transcript)
-
-        # 4. load the time values from the file "time.txt" in the folder
+        # 2. load the transcripts from the file "transcripts.bin" in the folder, the reader
+        # is memory-mapped and converts the rows to ints only when they are accessed
+        if os.path.exists(folder + "/transcripts.bin"):
+            transcripts = TranscriptReader(folder + "/transcripts.bin")
+
+        # older runs only have a "transcripts.txt", the runs in runs/ keep no transcripts at all
+        elif os.path.exists(folder + "/transcripts.txt"):
+            with open(folder + "/transcripts.txt", "r") as f:
+                for line in f:
+                    # the lines contain a list of 3 values, which are separated by ", "
+                    # so remove the ( and ) and split by ", "
+                    transcript = line.strip()[1:-1].split(", ")
+                    # transcript = line.strip().split(", ")
+                    transcript = [int(x) for x in transcript]
+                    transcripts.append(transcript)
+
+        # 3. load the time values from the file "time.txt" in the folder
         with open(folder + "/time.txt", "r") as f:
             for line in f:
                 time_values.append(float(line.strip()))
 
-        # 5. return the protocol parameters, transcripts and time values
+        # 4. return the protocol parameters, transcripts and time values
         return protocol, transcripts, time_values
     
     def analyse_attack(self, protocol, transcripts, time_values):
@@ -151,51 +159,93 @@ class Adversary:
         print("time_values:", time_values[:5])
 
     def determine_false_bits(self, recovered_secret_key):
-        # original secret in bit array
-        original_bits = [int(bit) for bit in bin(self.protocol.secret_key)[2:]]
-
-        # recovered secret in bit array
-        recovered_bits = recovered_secret_key
-
-        # find all bit positions that are different
-        different_bits = [i for i in range(len(original_bits)) if original_bits[i] != recovered_bits[i]]
-
-        # if there are no different bits, return empty Array
-        if len(different_bits) == 0:
-            return []
-        
-        return different_bits
+        # all bit positions where the recovered key differs from the original one
+        x_length = self.protocol.secret_key.bit_length()
+        errors = analysis.false_bits(np.asarray(recovered_secret_key)[:x_length], self.protocol.secret_key)
+        return np.flatnonzero(errors[0]).tolist()
     
     def analyse_bit_counters(self, bit_counters, transcript_counters):
-        # find all bit positions with a value of 0
-        zero_bits = [i for i in range(len(bit_counters)) if bit_counters[i] == 0]
-
-        # find all bit positions with a value of 1
-        one_bits = [i for i in range(len(bit_counters)) if bit_counters[i] == 1]
+        # the bit positions with a counter of 0, 1, -1, 2 and -2 and how many there are in total,
+        # see analysis.margin_histogram for every margin and analysis.analyse for many runs at once
+        by_margin = analysis.positions_by_margin(bit_counters)
+        zero_bits, one_bits, minus_one_bits, two_bits, minus_two_bits = (
+            by_margin.get(margin, np.zeros(0, dtype=int)).tolist() for margin in (0, 1, -1, 2, -2))
 
-        # find all bit positions with a value of -1
-        minus_one_bits = [i for i in range(len(bit_counters)) if bit_counters[i] == -1]
-
-        # find all bit positions with a value of 2
-        two_bits = [i for i in range(len(bit_counters)) if bit_counters[i] == 2]
-
-        # find all bit positions with a value of -2
-        minus_two_bits = [i for i in range(len(bit_counters)) if bit_counters[i] == -2]
-
-        # count the number of all bit positions for all values
         total_bit_sum = len(zero_bits) + len(one_bits) + len(minus_one_bits) + len(two_bits) + len(minus_two_bits)
 
-
         return zero_bits, one_bits, minus_one_bits, two_bits, minus_two_bits, total_bit_sum
     
     def analyse_transcript_counter(self, transcript_counters):
-        # find the positions in the array with the 5 smallest different values (if values are equal, all are returned)
-        smallest_values = np.argpartition(transcript_counters, 5)[:5]
-
-        # for each position save the value and the number of times it occurs
-        smallest_values = [(i, transcript_counters[i]) for i in smallest_values]
-
-        return smallest_values
+        # the 5 positions with the fewest transcripts and their counts, fewest first
+        positions, counts = analysis.low_coverage(transcript_counters, 5)
+        return [(int(i), int(count)) for i, count in zip(positions[0], counts[0])]
+
+    def accumulator(self, margin=None, bias=0.75):
+        # incremental key recovery for this protocol, see SecretAccumulator
+        return SecretAccumulator(self.backdoor_key, self.protocol.secret_key.bit_length(), self.prf_length(), margin, bias)
+
+class SecretAccumulator:
+    # running bit_counters / transcript_counters that take transcripts one at a time or in chunks,
+    # so the recovered key and its confidence are available at any point of the attack
+    #
+    # bias is the probability that a single transcript leaks the right bit; the subverted prover
+    # keeps its first commitment if it leaks the right bit and resamples once otherwise, which
+    # gives 1/2 + 1/2 * 1/2 = 3/4
+    def __init__(self, backdoor_key, x_length, prf_width, margin=None, bias=0.75):
+        self.backdoor_key = backdoor_key
+        self.x_length = x_length
+        self.prf_width = prf_width
+        self.margin = margin
+        self.bias = bias
+
+        self.bit_counters = np.zeros(x_length, dtype=int)
+        self.transcript_counters = np.zeros(x_length, dtype=int)
+        self.num_transcripts = 0
+
+        # number of bit positions whose |bit_counter| has reached the margin
+        self.settled = 0
+
+    def update(self, l, b):
+        # adds one already evaluated (l, b) pair
+        before = self.margin is not None and abs(self.bit_counters[l]) >= self.margin
+        self.bit_counters[l] += (1 if b else -1)
+        self.transcript_counters[l] += 1
+        self.num_transcripts += 1
+
+        if self.margin is not None:
+            after = abs(self.bit_counters[l]) >= self.margin
+            self.settled += int(after) - int(before)
+
+    def add(self, transcript):
+        t, c, z = transcript
+        l, b = aes_prf(self.backdoor_key, t, self.x_length, self.prf_width)
+        self.update(l, b)
+
+    def add_chunk(self, transcripts):
+        # evaluates the PRF for the whole chunk at once
+        t_values = [transcript[0] for transcript in transcripts]
+        if not t_values:
+            return
+
+        l, b = aes_prf_batch(self.backdoor_key, t_values, self.x_length, self.prf_width)
+        np.add.at(self.bit_counters, l, np.where(b == 1, 1, -1))
+        self.transcript_counters += np.bincount(l, minlength=self.x_length)
+        self.num_transcripts += len(t_values)
+
+        if self.margin is not None:
+            self.settled = int(np.count_nonzero(np.abs(self.bit_counters) >= self.margin))
+
+    def recovered_key(self):
+        # majority vote for each bit position, same as Adversary.obtain_secret
+        return [1 if count > 0 else 0 for count in self.bit_counters]
+
+    def confidence(self):
+        # per-bit probability that the majority vote is right, see analysis.confidence
+        return analysis.confidence(self.bit_counters, self.bias)
+
+    def is_complete(self):
+        # True once every bit's margin has reached the threshold
+        return self.margin is not None and self.settled == self.x_length
 
     
 def main():
@@ -1,5 +1,7 @@
+from functools import lru_cache
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad
+import numpy as np
 
 def int_to_bytes(x, size):
     return x.to_bytes(size, 'big')
@@ -29,3 +31,61 @@ def aes_prf(key, t, x_length, output_length=16):
     b = (encrypted_int // x_length) % 2 # b is in {0, 1}
 
     return l, b
+
+
+@lru_cache(maxsize=None)
+def ecb_cipher(key):
+    # one cached ECB cipher per key, CBC chaining is done by hand on top of it
+    return AES.new(key, AES.MODE_ECB)
+
+def int_rows(values, width):
+    # values as an (n, width) uint8 array of big-endian rows; 2D uint8 arrays are used as they are
+    if isinstance(values, np.ndarray) and values.dtype == np.uint8 and values.ndim == 2:
+        if values.shape[1] == width:
+            return values
+        rows = np.zeros((values.shape[0], width), dtype=np.uint8)
+        rows[:, width - values.shape[1]:] = values
+        return rows
+
+    data = b"".join(int(value).to_bytes(width, 'big') for value in values)
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+
+def cbc_encrypt_rows(key, rows, n_blocks):
+    # CBC with a zero IV applied to every row on its own, but with one ECB call per block column
+    # only the first n_blocks blocks of each row are encrypted
+    cipher = ecb_cipher(key)
+    n = rows.shape[0]
+    encrypted = np.empty((n, n_blocks * 16), dtype=np.uint8)
+    previous = np.zeros((n, 16), dtype=np.uint8)
+
+    for j in range(n_blocks):
+        block = np.ascontiguousarray(rows[:, j * 16:(j + 1) * 16] ^ previous)
+        previous = np.frombuffer(cipher.encrypt(block.tobytes()), dtype=np.uint8).reshape(n, 16)
+        encrypted[:, j * 16:(j + 1) * 16] = previous
+
+    return encrypted
+
+def pad_rows(rows):
+    # PKCS#7 padding of every row, same as Crypto.Util.Padding.pad
+    pad_length = 16 - rows.shape[1] % 16
+    padded = np.full((rows.shape[0], rows.shape[1] + pad_length), pad_length, dtype=np.uint8)
+    padded[:, :rows.shape[1]] = rows
+    return padded
+
+# batch version of aes_prf: ts is a list of ints or an (n, output_length) uint8 array,
+# returns l and b as NumPy arrays that match aes_prf value for value
+def aes_prf_batch(key, ts, x_length, output_length=16):
+    padded_data = pad_rows(int_rows(ts, output_length))
+    encrypted_bytes = cbc_encrypt_rows(key, padded_data, (output_length + 15) // 16)[:, :output_length]
+
+    # encrypted_int mod 2 * x_length by Horner's rule over the bytes, which gives both
+    # l = encrypted_int % x_length and b = (encrypted_int // x_length) % 2
+    modulus = 2 * x_length
+    remainder = np.zeros(encrypted_bytes.shape[0], dtype=np.int64)
+    for column in encrypted_bytes.T:
+        remainder = (remainder * 256 + column) % modulus
+
+    l = remainder % x_length
+    b = remainder // x_length
+
+    return l, b
@@ -0,0 +1,129 @@
+import numpy as np
+
+# counter analysis of the stateless attack for one run (1D arrays) or many runs at once (2D
+# arrays of runs x bit positions); bit position i is the i-th bit of bin(x), most significant
+# first, as in Adversary.obtain_secret
+#
+# runs with shorter keys are padded on the right (see stack), lengths gives the number of
+# real positions of every run so the padding is left out
+
+def as_runs(values):
+    return np.atleast_2d(np.asarray(values))
+
+def stack(rows, fill=0):
+    # rows of different lengths as one (runs, max length) array padded with fill, and the lengths
+    lengths = np.array([len(row) for row in rows])
+    stacked = np.full((len(rows), int(lengths.max(initial=0))), fill, dtype=np.int64)
+    for i, row in enumerate(rows):
+        stacked[i, :len(row)] = row
+    return stacked, lengths
+
+def valid_positions(shape, lengths=None):
+    # (runs, width) mask of the positions that are not padding
+    runs, width = shape
+    if lengths is None:
+        return np.ones((runs, width), dtype=bool)
+    return np.arange(width)[None, :] < np.asarray(lengths)[:, None]
+
+def key_bits(secret_keys, width=None):
+    # bits of every key, most significant first, as a (runs, width) uint8 array
+    secret_keys = [secret_keys] if isinstance(secret_keys, int) else [int(x) for x in secret_keys]
+    width = max(x.bit_length() for x in secret_keys) if width is None else width
+    n_bytes = (width + 7) // 8
+
+    # every key is shifted so that its most significant bit is the first bit of its row
+    data = b"".join((x << (8 * n_bytes - x.bit_length())).to_bytes(n_bytes, 'big') for x in secret_keys)
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(len(secret_keys), n_bytes)
+    return np.unpackbits(rows, axis=1)[:, :width]
+
+def recovered_bits(bit_counters):
+    # majority vote of every bit position, ties give 0
+    return (as_runs(bit_counters) > 0).astype(np.uint8)
+
+def false_bits(recovered, secret_keys, lengths=None):
+    # (runs, width) mask of the recovered bits that differ from the keys
+    recovered = as_runs(recovered)
+    errors = recovered != key_bits(secret_keys, recovered.shape[1])
+    return errors & valid_positions(recovered.shape, lengths)
+
+def margin_histogram(bit_counters, lengths=None):
+    # (margins, counts) with counts[r, i] the number of bit positions of run r whose counter is
+    # margins[i], for every margin between the smallest and the largest counter
+    counters = as_runs(bit_counters)
+    valid = valid_positions(counters.shape, lengths)
+    if not valid.any():
+        return np.zeros(0, dtype=np.int64), np.zeros((counters.shape[0], 0), dtype=np.int64)
+
+    low, high = counters[valid].min(), counters[valid].max()
+    margins = np.arange(low, high + 1)
+
+    # one bincount over all runs, every run has its own block of len(margins) bins
+    bins = np.clip(counters - low, 0, len(margins) - 1) + np.arange(counters.shape[0])[:, None] * len(margins)
+    counts = np.bincount(bins.ravel(), weights=valid.ravel(), minlength=counters.shape[0] * len(margins))
+    return margins, counts.astype(np.int64).reshape(counters.shape[0], len(margins))
+
+def positions_by_margin(bit_counters):
+    # {margin: positions} of a single run, from one sort of the counters
+    counters = np.asarray(bit_counters)
+    order = np.argsort(counters, kind="stable")
+    margins, starts = np.unique(counters[order], return_index=True)
+    return {int(margin): positions for margin, positions in zip(margins, np.split(order, starts[1:]))}
+
+def confidence(bit_counters, bias=0.75):
+    # probability that the majority vote of every bit position is right, in the shape of
+    # bit_counters: every transcript multiplies the odds by bias / (1 - bias), so a margin m
+    # gives 1 / (1 + ((1 - bias) / bias) ^ |m|)
+    odds = (1 - bias) / bias
+    return 1 / (1 + odds ** np.abs(np.asarray(bit_counters)))
+
+def low_coverage(transcript_counters, k=5, lengths=None):
+    # (positions, counts) of the k positions of every run with the fewest transcripts, fewest first
+    counters = as_runs(transcript_counters)
+    counters = np.where(valid_positions(counters.shape, lengths), counters, np.iinfo(np.int64).max)
+    k = min(k, counters.shape[1])
+    if not k:
+        return np.zeros((counters.shape[0], 0), dtype=np.int64), np.zeros((counters.shape[0], 0), dtype=np.int64)
+
+    positions = np.argpartition(counters, k - 1, axis=1)[:, :k]
+    counts = np.take_along_axis(counters, positions, axis=1)
+    order = np.argsort(counts, axis=1, kind="stable")
+    return np.take_along_axis(positions, order, axis=1), np.take_along_axis(counts, order, axis=1)
+
+def analyse(bit_counters, transcript_counters, secret_keys=None, lengths=None, bias=0.75, k=5):
+    # everything above for one or many runs; the error fields are only there with the keys
+    bit_counters = as_runs(bit_counters)
+    margins, histogram = margin_histogram(bit_counters, lengths)
+    positions, counts = low_coverage(transcript_counters, k, lengths)
+    result = {
+        "margins": margins,
+        "histogram": histogram,
+        "confidence": np.where(valid_positions(bit_counters.shape, lengths), confidence(bit_counters, bias), np.nan),
+        "low_coverage_positions": positions,
+        "low_coverage_counts": counts,
+    }
+
+    if secret_keys is not None:
+        errors = false_bits(recovered_bits(bit_counters), secret_keys, lengths)
+        result["errors"] = errors
+        result["error_counts"] = errors.sum(axis=1)
+
+    return result
+
+def analyse_runs(folders, bias=0.75, k=5):
+    # loads every saved attack in folders, recomputes its counters and analyses all of them at once
+    from adversary import Adversary
+
+    adversary = Adversary.empty()
+    bit_rows, transcript_rows, secret_keys = [], [], []
+    for folder in folders:
+        protocol, transcripts, time_values = adversary.load_attack(folder)
+        adversary.set_protocol(protocol)
+        adversary.set_backdoor_key(protocol["bd_key"])
+        _, bit_counters, transcript_counters = adversary.obtain_secret_detailed(transcripts)
+        bit_rows.append(bit_counters)
+        transcript_rows.append(transcript_counters)
+        secret_keys.append(protocol["secret_key"])
+
+    bit_counters, lengths = stack(bit_rows)
+    transcript_counters, _ = stack(transcript_rows)
+    return analyse(bit_counters, transcript_counters, secret_keys, lengths, bias, k)
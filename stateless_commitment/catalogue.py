@@ -0,0 +1,191 @@
+import os
+import sqlite3
+import argparse
+import numpy as np
+from adversary import Adversary
+from transcript_store import HEADER, TranscriptReader
+
+# SQLite index of saved attacks (folders with a protocol.txt, time.txt and transcripts): one row
+# of metadata per run, so runs can be filtered without opening their folders, and the offsets of
+# transcripts.bin, so only the transcript columns a job needs are mapped into memory
+COLUMNS = (
+    ("folder", "TEXT PRIMARY KEY"),
+    ("variant", "TEXT"),
+    ("bit_number", "INTEGER"),
+    ("x_length", "INTEGER"),
+    ("rounds", "INTEGER"),
+    ("bit_errors", "INTEGER"),
+    ("recovery", "REAL"),
+    ("time_total", "REAL"),
+    ("time_mean", "REAL"),
+    ("time_p50", "REAL"),
+    ("time_p99", "REAL"),
+    ("transcripts_path", "TEXT"),
+    ("header_size", "INTEGER"),
+    ("t_width", "INTEGER"),
+    ("c_width", "INTEGER"),
+    ("z_width", "INTEGER"),
+    ("modified", "REAL"),
+)
+
+def run_modified(folder):
+    # latest modification time of the files of a run, used to skip runs that did not change
+    return max(os.path.getmtime(os.path.join(folder, name)) for name in os.listdir(folder))
+
+def find_runs(roots):
+    # every folder below roots that holds a protocol.txt
+    for root in roots:
+        for folder, _, files in os.walk(root):
+            if "protocol.txt" in files:
+                yield folder
+
+class RunCatalogue:
+    def __init__(self, path="runs.sqlite"):
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS runs ({', '.join(f'{name} {kind}' for name, kind in COLUMNS)})")
+        for name in ("bit_number", "recovery", "variant", "rounds"):
+            self.connection.execute(f"CREATE INDEX IF NOT EXISTS runs_{name} ON runs ({name})")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def index(self, folder, variant="stateless_commitment", recover=True):
+        # adds or refreshes the row of one run, returns False if it was already up to date;
+        # with recover the key is recovered from the transcripts to fill in bit_errors and recovery
+        folder = os.path.abspath(folder)
+        modified = run_modified(folder)
+        row = self.connection.execute("SELECT modified FROM runs WHERE folder = ?", (folder,)).fetchone()
+        if row is not None and row["modified"] == modified:
+            return False
+
+        adversary = Adversary.empty()
+        protocol, transcripts, time_values = adversary.load_attack(folder)
+        adversary.set_protocol(protocol)
+        adversary.set_backdoor_key(protocol["bd_key"])
+
+        times = np.array(time_values, dtype=float)
+        x_length = protocol["secret_key"].bit_length()
+        # a transcripts.bin knows its row count, even when that is 0; the runs without transcripts
+        # (e.g. the ones in runs/) only have their round times
+        if isinstance(transcripts, TranscriptReader) or len(transcripts):
+            rounds = len(transcripts)
+        else:
+            rounds = len(times)
+
+        bit_errors = None
+        if recover and len(transcripts):
+            bit_errors = len(adversary.determine_false_bits(adversary.obtain_secret(transcripts)))
+
+        values = {
+            "folder": folder,
+            "variant": variant,
+            "bit_number": protocol["bit_number"],
+            "x_length": x_length,
+            "rounds": rounds,
+            "bit_errors": bit_errors,
+            "recovery": None if bit_errors is None else 1 - bit_errors / x_length,
+            "time_total": float(times.sum()) if len(times) else None,
+            "time_mean": float(times.mean()) if len(times) else None,
+            "time_p50": float(np.percentile(times, 50)) if len(times) else None,
+            "time_p99": float(np.percentile(times, 99)) if len(times) else None,
+            "transcripts_path": None,
+            "header_size": None,
+            "t_width": None,
+            "c_width": None,
+            "z_width": None,
+            "modified": modified,
+        }
+        if isinstance(transcripts, TranscriptReader):
+            values["transcripts_path"] = os.path.join(folder, "transcripts.bin")
+            values["header_size"] = HEADER.size
+            values["t_width"], values["c_width"], values["z_width"] = transcripts.widths
+
+        names = [name for name, _ in COLUMNS]
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+            [values[name] for name in names])
+        self.connection.commit()
+        return True
+
+    def index_all(self, roots, variant="stateless_commitment", recover=True):
+        # indexes every run below roots, returns the number of runs that were added or refreshed
+        return sum(self.index(folder, variant, recover) for folder in find_runs(roots))
+
+    def query(self, bit_number=None, variant=None, min_recovery=None, max_recovery=None, min_rounds=None, max_rounds=None):
+        # rows of the runs that match every given filter, as dicts ordered by folder
+        filters = [
+            ("bit_number = ?", bit_number),
+            ("variant = ?", variant),
+            ("recovery >= ?", min_recovery),
+            ("recovery <= ?", max_recovery),
+            ("rounds >= ?", min_rounds),
+            ("rounds <= ?", max_rounds),
+        ]
+        clauses = [clause for clause, value in filters if value is not None]
+        parameters = [value for _, value in filters if value is not None]
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        rows = self.connection.execute(f"SELECT * FROM runs{where} ORDER BY folder", parameters)
+        return [dict(row) for row in rows]
+
+    def columns(self, run, names=("t",)):
+        # {name: (rounds, width) uint8 view} of the given transcript columns of a run, memory-mapped
+        # straight from the offsets in the catalogue, so nothing else of the file is read
+        if run["transcripts_path"] is None:
+            raise ValueError(f"{run['folder']} has no transcripts.bin")
+
+        widths = {"t": run["t_width"], "c": run["c_width"], "z": run["z_width"]}
+        row_width = sum(widths.values())
+
+        # an empty file cannot be memory-mapped
+        if run["rounds"]:
+            rows = np.memmap(run["transcripts_path"], dtype=np.uint8, mode="r", offset=run["header_size"], shape=(run["rounds"], row_width))
+        else:
+            rows = np.zeros((0, row_width), dtype=np.uint8)
+
+        offsets = {}
+        start = 0
+        for name in ("t", "c", "z"):
+            offsets[name] = (start, start + widths[name])
+            start += widths[name]
+
+        return {name: rows[:, offsets[name][0]:offsets[name][1]] for name in names}
+
+def main():
+    parser = argparse.ArgumentParser(description="index saved attacks and query them")
+    parser.add_argument("--db", default="runs.sqlite", help="catalogue file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index = commands.add_parser("index", help="add or refresh every run below the given folders")
+    index.add_argument("roots", nargs="+")
+    index.add_argument("--no-recover", action="store_true", help="do not recover the keys (no bit_errors / recovery)")
+
+    query = commands.add_parser("query", help="list the runs that match the filters")
+    query.add_argument("--bits", type=int, default=None)
+    query.add_argument("--variant", default=None)
+    query.add_argument("--min-recovery", type=float, default=None)
+    query.add_argument("--max-recovery", type=float, default=None)
+    query.add_argument("--min-rounds", type=int, default=None)
+    query.add_argument("--max-rounds", type=int, default=None)
+    args = parser.parse_args()
+
+    with RunCatalogue(args.db) as catalogue:
+        if args.command == "index":
+            print("indexed", catalogue.index_all(args.roots, recover=not args.no_recover), "runs")
+            return
+
+        for run in catalogue.query(args.bits, args.variant, args.min_recovery, args.max_recovery, args.min_rounds, args.max_rounds):
+            recovery = "-" if run["recovery"] is None else f"{run['recovery']:.4f}"
+            total = "-" if run["time_total"] is None else f"{run['time_total']:.1f} s"
+            print(f"{run['folder']}  bits {run['bit_number']}  rounds {run['rounds']}  recovery {recovery}  time {total}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.seeds import seed_stream
+from aes_prf import aes_prf_batch
+from subverted_schnorr import SchnorrIdentificationProtocol
+from adversary import Adversary
+from transcript_store import TranscriptArray
+from stopping import MinCountPolicy
+
+# protocol of the current worker process, created once by init_worker
+worker_protocol = None
+
+def init_worker(backdoor_key, secret_key):
+    # the shared state (group, x, backdoor key, fixed-base table) is set up once per worker
+    global worker_protocol
+    worker_protocol = SchnorrIdentificationProtocol(backdoor_key, secret_key)
+
+def run_shard(seed, rounds):
+    # every shard has its own RNG stream, so its transcripts do not depend on the worker that runs it
+    random.seed(seed)
+    return worker_protocol.simulate(rounds=rounds)
+
+def simulate_parallel(protocol, workers=None, shard_size=256, seed=None, transcripts_per_bit=19, stopping=None):
+    # parallel version of protocol.simulate(): shards of shard_size rounds run ahead on a
+    # process pool and are merged back in order until the stopping policy is complete (by default
+    # every bit position of the secret key has transcripts_per_bit transcripts), the rounds of the
+    # last shard past that are dropped
+    workers = workers or os.cpu_count()
+    x_length = protocol.secret_key.bit_length()
+    if stopping is None:
+        stopping = MinCountPolicy(x_length, transcripts_per_bit)
+
+    transcripts = TranscriptArray(protocol.group.byte_length)
+    time_values = []
+    seeds = seed_stream(seed)
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(protocol.bd_key, protocol.secret_key)) as pool:
+        # keep two shards per worker in flight
+        pending = [pool.submit(run_shard, next(seeds), shard_size) for _ in range(2 * workers)]
+
+        while not stopping.is_complete():
+            result = pending.pop(0).result()
+            pending.append(pool.submit(run_shard, next(seeds), shard_size))
+
+            if result is None:
+                print("Verification failed")
+                for future in pending:
+                    future.cancel()
+                return
+
+            shard_transcripts, shard_time_values = result
+            l, b = aes_prf_batch(protocol.bd_key, shard_transcripts.column("t"), x_length, protocol.group.prf_length)
+
+            # only the rounds up to the one that completes the stopping policy are kept
+            used = len(shard_transcripts)
+            for i in range(len(shard_transcripts)):
+                stopping.update(l[i], b[i])
+                if stopping.is_complete():
+                    used = i + 1
+                    break
+
+            transcripts.extend_rows(shard_transcripts.rows[:used])
+            time_values.extend(shard_time_values[:used])
+
+        for future in pending:
+            future.cancel()
+
+    protocol.num_rounds += len(transcripts)
+    print("Number of rounds: ", protocol.num_rounds)
+
+    return transcripts, time_values
+
+def main():
+    backdoor_key = os.urandom(32)  # Use a random 32-byte key as the backdoor key
+
+    protocol = SchnorrIdentificationProtocol(backdoor_key)
+    adversary = Adversary(protocol, backdoor_key)
+
+    start_time = time.perf_counter()
+    transcripts, time_values = simulate_parallel(protocol)
+    print("Time: ", time.perf_counter() - start_time)
+
+    recovered_x = adversary.obtain_secret(transcripts)
+    false_bits = adversary.determine_false_bits(recovered_x)
+    print("Number of different bits: ", len(false_bits))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import base64
+from functools import lru_cache
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.groups import get_curve, get_group
+
+# protocol.txt of a saved attack: one "key,value" line per field, written by save_attack.
+# Version 2 and later files start with a "version,N" line, files without it are version 1 (same
+# fields); version 3 adds a "group" line with the name of the group (modp or a curve from
+# curves.py), older files are MODP runs.
+# p, q and g are written in decimal so every run stays self-contained, but when they match the
+# registry group (the curve, or the group of bit_number in primes.json) the loader takes the
+# ints of the group registry instead of parsing them again
+VERSION = 3
+FIELDS = ("bit_number", "p", "q", "g", "x", "y", "bd_key")
+OPTIONAL_FIELDS = ("version", "group")
+
+class RunMetadata:
+    def __init__(self, bit_number, params, secret_key, public_key, bd_key, version=VERSION, group=None, group_name="modp"):
+        self.version = version
+        self.group_name = group_name
+        self.bit_number = bit_number
+        self.params = tuple(params)
+        self.secret_key = secret_key
+        self.public_key = public_key
+        self.bd_key = bd_key
+
+        # the registry group the parameters were checked against, None if bit_number has none
+        self.group = group
+
+    def __getitem__(self, key):
+        # protocol["bd_key"] and the other keys of the dict load_attack used to return
+        return getattr(self, key)
+
+    @classmethod
+    def from_protocol(cls, protocol):
+        group = getattr(protocol, "group", None)
+        group_name = group.name if group is not None else getattr(protocol, "group_name", "modp")
+        return cls(protocol.bit_number, protocol.params, protocol.secret_key, protocol.public_key, protocol.bd_key, group=group, group_name=group_name)
+
+    def lines(self):
+        p, q, g = self.params
+        values = (VERSION, self.group_name, self.bit_number, p, q, g, self.secret_key, self.public_key, base64.b64encode(self.bd_key).decode("utf-8"))
+        return [f"{key},{value}\n" for key, value in zip(OPTIONAL_FIELDS + FIELDS, values)]
+
+@lru_cache(maxsize=None)
+def registry_params(group_name, bit_number, primes):
+    # (decimal strings, group) of p, q and g of the registry group, or None if there is none;
+    # the strings are compared with the lines of protocol.txt, so a match costs no parsing
+    try:
+        group = get_group(bit_number, primes) if group_name == "modp" else get_curve(group_name)
+    except (FileNotFoundError, KeyError):
+        return None
+    return tuple(str(value) for value in group.params), group
+
+def parse_fields(lines, path="protocol.txt"):
+    # {key: raw value} in one pass, exact keys only; unknown, repeated or missing keys are errors
+    fields = {}
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        key, separator, value = line.partition(",")
+        if not separator or (key not in FIELDS and key not in OPTIONAL_FIELDS):
+            raise ValueError(f"{path}:{number}: unexpected line {line[:40]!r}")
+        if key in fields:
+            raise ValueError(f"{path}:{number}: {key} given twice")
+        fields[key] = value
+
+    missing = [key for key in FIELDS if key not in fields]
+    if missing:
+        raise ValueError(f"{path}: missing {', '.join(missing)}")
+
+    version = int(fields.pop("version", 1))
+    if version > VERSION:
+        raise ValueError(f"{path}: version {version} is newer than {VERSION}")
+    return version, fields
+
+def load_metadata(folder, primes="primes.json", check_key=False):
+    # RunMetadata of folder/protocol.txt; p, q and g must match the registry group (a curve, or
+    # the group of bit_number if primes has one), otherwise q must be (p - 1) / 2. check_key also
+    # verifies y = g^x
+    path = folder + "/protocol.txt"
+    with open(path, "r") as f:
+        version, fields = parse_fields(f, path)
+
+    bit_number = int(fields["bit_number"])
+    group_name = fields.get("group", "modp")
+    raw_params = (fields["p"], fields["q"], fields["g"])
+
+    registry = registry_params(group_name, bit_number, primes)
+    if registry is not None:
+        strings, group = registry
+        if raw_params != strings:
+            raise ValueError(f"{path}: p, q, g differ from the {group_name} group of {bit_number} bits")
+        params = group.params
+    elif group_name != "modp":
+        raise ValueError(f"{path}: unknown group {group_name}")
+    else:
+        group = None
+        params = tuple(int(value) for value in raw_params)
+        if params[1] != (params[0] - 1) // 2:
+            raise ValueError(f"{path}: q is not (p - 1) / 2")
+
+    metadata = RunMetadata(bit_number, params, int(fields["x"]), int(fields["y"]), base64.b64decode(fields["bd_key"]), version, group, group_name)
+
+    if check_key:
+        p, q, g = params
+        public_key = group.g_table.pow(metadata.secret_key) if group is not None else pow(g, metadata.secret_key, p)
+        if public_key != metadata.public_key:
+            raise ValueError(f"{path}: y is not g^x")
+
+    return metadata
+
+def save_metadata(folder, protocol):
+    # writes folder/protocol.txt for a protocol object (or a RunMetadata) in the current version
+    with open(folder + "/protocol.txt", "w") as f:
+        f.writelines(RunMetadata.from_protocol(protocol).lines())
@@ -0,0 +1,84 @@
+import os
+import math
+import time
+from stopping import ConfidencePolicy
+from subverted_schnorr import SchnorrIdentificationProtocol
+from adversary import Adversary
+import repo_root  # adds the repository root, with the shared package, to sys.path
+import shared.signature
+from shared.signature import SignatureVerifier
+
+# Fiat-Shamir signatures (see shared/signature.py) with the subverted prover: every signature
+# carries a commitment t that was picked to leak a bit of x through the backdoor PRF, exactly as
+# in the interactive attack; the adversary recovers x from the (t, c, z) transcripts of
+# published signatures
+
+class Signer(shared.signature.Signer):
+    def commitment(self):
+        # the subverted prover also returns the leaked bit position
+        t, l = self.prover.prover_commitment()
+        return t
+
+    def precompute(self, n):
+        # offline phase: enough (r, t) candidates for n signatures on average, the prover draws
+        # more than one candidate per signature when it rejects one
+        self.prover.precompute(math.ceil(n * self.prover.expected_cost()["candidates"]))
+
+class SubvertedSignatureScheme:
+    # key pair, signer and verifier on top of the subverted prover and the honest verifier
+    def __init__(self, backdoor_key, secret_key=None, max_attempts=2, pool_size=None, instrument=None):
+        self.protocol = SchnorrIdentificationProtocol(backdoor_key, secret_key, max_attempts, pool_size, instrument)
+        self.group = self.protocol.group
+        self.params = self.protocol.params
+        self.secret_key = self.protocol.secret_key
+        self.public_key = self.protocol.public_key
+        self.bd_key = backdoor_key
+
+        self.signer = Signer(self.protocol.subverted_prover)
+        self.verifier = SignatureVerifier(self.protocol.honest_verifier)
+
+    def close(self):
+        self.protocol.close()
+
+def main():
+    backdoor_key = os.urandom(32)  # Use a random 32-byte key as the backdoor key
+
+    scheme = SubvertedSignatureScheme(backdoor_key)
+    adversary = Adversary(scheme.protocol, backdoor_key)
+
+    # the adversary only sees published signatures, it signs batches until every bit of x is
+    # recovered with probability 0.99 overall
+    x_length = scheme.secret_key.bit_length()
+    accumulator = adversary.accumulator(ConfidencePolicy.for_key(x_length, 0.99).margin)
+
+    batch_size = 256
+    signed = 0
+    sign_time = 0
+    verify_time = 0
+    while not accumulator.is_complete():
+        messages = [f"message {signed + i}".encode() for i in range(batch_size)]
+
+        start_time = time.perf_counter()
+        signatures = scheme.signer.sign_batch(messages)
+        sign_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        valid, index = scheme.verifier.verify_batch(messages, signatures)
+        verify_time += time.perf_counter() - start_time
+        if not valid:
+            print("Verification failed")
+            return
+
+        accumulator.add_chunk(scheme.verifier.transcripts(messages, signatures))
+        signed += batch_size
+
+    scheme.close()
+
+    recovered_x = int("".join(str(bit) for bit in accumulator.recovered_key()), 2)
+    print("Signatures:", signed)
+    print("Signatures per second:", signed / sign_time)
+    print("Verifications per second:", signed / verify_time)
+    print("Recovered:", recovered_x == scheme.secret_key)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import math
+from adversary import SecretAccumulator
+
+# stopping policies for the stateless leakage loop: every policy takes the (l, b) leaked by a
+# round with update() and says with is_complete() whether the attack has enough transcripts;
+# any SecretAccumulator with a margin can be used as a policy as well
+
+class CoverageTracker:
+    # number of transcripts per bit position with an O(1) running minimum: levels[k] is the
+    # number of positions with exactly k transcripts, and the minimum only moves up when the
+    # level it points to is empty
+    def __init__(self, x_length):
+        self.counts = [0] * x_length
+        self.levels = [x_length]
+        self.minimum = 0
+
+    def add(self, l):
+        k = self.counts[l]
+        self.counts[l] = k + 1
+
+        self.levels[k] -= 1
+        if k + 1 == len(self.levels):
+            self.levels.append(0)
+        self.levels[k + 1] += 1
+
+        while not self.levels[self.minimum]:
+            self.minimum += 1
+
+class MinCountPolicy:
+    # stops once every bit position has at least transcripts_per_bit transcripts (the original attack)
+    def __init__(self, x_length, transcripts_per_bit=19):
+        self.transcripts_per_bit = transcripts_per_bit
+        self.coverage = CoverageTracker(x_length)
+
+    def update(self, l, b):
+        self.coverage.add(l)
+
+    def is_complete(self):
+        return self.coverage.minimum >= self.transcripts_per_bit
+
+def margin_for(epsilon, bias=0.75):
+    # smallest vote margin m with 1 / (1 + (bias / (1 - bias)) ^ m) <= epsilon, i.e. the margin
+    # at which a majority vote is wrong with probability at most epsilon
+    return max(1, math.ceil(math.log((1 - epsilon) / epsilon) / math.log(bias / (1 - bias))))
+
+class ConfidencePolicy(SecretAccumulator):
+    # stops once the majority vote of every bit is wrong with probability at most epsilon;
+    # bias is the probability that a single transcript leaks the right bit (3/4 for the
+    # subverted prover that resamples once)
+    #
+    # the votes and settled positions are those of a SecretAccumulator with the margin for
+    # epsilon, fed through update() only, so it needs no backdoor key
+    def __init__(self, x_length, epsilon, bias=0.75):
+        super().__init__(None, x_length, None, margin_for(epsilon, bias), bias)
+        self.epsilon = epsilon
+
+    @classmethod
+    def for_key(cls, x_length, success, bias=0.75):
+        # policy under which the whole key is recovered with probability at least success
+        return cls(x_length, 1 - success ** (1 / x_length), bias)
@@ -1,22 +1,20 @@
 import os
 import random
-import json
 import time
-from dotenv import load_dotenv
+import repo_root  # adds the repository root, with the shared package, to sys.path
+from shared.groups import Group, default_group
+from shared.commitment_pool import CommitmentPool
+from shared.instrumentation import DISABLED, Instrument, phase
+from transcript_store import TranscriptArray
+from stopping import MinCountPolicy
 from aes_prf import aes_prf
 from adversary import Adversary
 
-def hex_to_int(hex_str):
-    hex_str = hex_str.replace(' ', '')
-    return int(hex_str, 16)
-
-def load_data(filename):
-    with open(filename, 'r') as file:
-        data = json.load(file)
-    return data
-
 class SubvertedProver:
-    def __init__(self, p, q, g, x, A, backdoor_key, bit_number):
+    # max_attempts is the number of candidate commitments per round: a candidate is kept as soon
+    # as it leaks the right bit, the last one is kept whatever it leaks (2 is the original attack,
+    # 1 never rejects)
+    def __init__(self, p, q, g, x, A, backdoor_key, bit_number, group=None, max_attempts=2, pool=None, instrument=None):
         self.protocol = (p, q, g)
         self.secret_key = x
         self.x_bits = [int(bit) for bit in bin(x)[2:]]
@@ -24,66 +22,156 @@ class SubvertedProver:
         self.r = None
         self.bd_key = backdoor_key
         self.bit_number = bit_number
+        self.group = group if group is not None else Group(p.bit_length(), p, g)
+        self.g_table = self.group.g_table
+        self.max_attempts = max_attempts
+        self.pool = pool
+        self.instrument = instrument if instrument is not None else DISABLED
+
+        # (l, b) the backdoor PRF gave for the last commitment, None if the prover kept it
+        # without evaluating the PRF
+        self.leak = None
+
+        # work done in the last round and in all rounds so far
+        self.last_round = None
+        self.totals = {"exponentiations": 0, "precomputed": 0, "prf_calls": 0, "rejections": 0}
+
+    def precompute(self, n):
+        # offline phase: n (r, t) candidates into the commitment pool, a pool without a refill
+        # thread is created for them if the prover has none
+        if self.pool is None:
+            p, q, g = self.protocol
+            self.pool = CommitmentPool(p, q, g, 0, group=self.group)
+        self.pool.fill(n)
+
+    def draw_candidate(self, costs):
+        # precomputed by precompute() or in the background by the commitment pool
+        if self.pool is not None:
+            pair = self.pool.try_draw()
+            if pair is not None:
+                costs["precomputed"] += 1
+                return pair
 
-    def prover_commitment(self):
         p, q, g = self.protocol
-        self.r = random.randint(1, q - 1)
-        t = pow(g, self.r, p)
+        r = random.randint(1, q - 1)
+        costs["exponentiations"] += 1
+        return r, self.g_table.pow(r)
+
+    @phase("commitment")
+    def prover_commitment(self):
+        costs = {"exponentiations": 0, "precomputed": 0, "prf_calls": 0, "rejections": 0}
+        l = None
+
+        for attempt in range(self.max_attempts):
+            self.r, t = self.draw_candidate(costs)
+            self.leak = None
+
+            # the last candidate is kept without looking at the bit it leaks
+            if attempt == self.max_attempts - 1:
+                break
+
+            # subverted commitment
+            with self.instrument.span("prf"):
+                l, b = aes_prf(self.bd_key, t, self.secret_key.bit_length(), self.group.prf_length)
+            costs["prf_calls"] += 1
+            self.leak = (l, b)
+            if self.x_bits[l] == b:
+                break
+
+            costs["rejections"] += 1
+
+        self.last_round = costs
+        for key, value in costs.items():
+            self.totals[key] += value
 
-        # subverted commitment
-        l, b = aes_prf(self.bd_key, t, self.secret_key.bit_length(), self.bit_number // 8)
-        if self.x_bits[l] == b:
-            return t, l
-        
-        self.r = random.randint(1, q - 1)
-        t = pow(g, self.r, p)
         return t, l
+
+    def expected_cost(self):
+        # expected work per round and probability that a transcript leaks the right bit;
+        # candidate i (counting from 0) is only drawn if the i before it were all rejected
+        k = self.max_attempts
+        return {
+            "candidates": sum(0.5 ** i for i in range(k)),
+            "prf_calls": sum(0.5 ** i for i in range(k - 1)),
+            "rejections": sum(0.5 ** i for i in range(1, k)),
+            "bias": 1 - 0.5 ** k,
+        }
     
+    @phase("response")
     def prover_response(self, c):
         p, q, _ = self.protocol
         z = (self.r - c * self.secret_key) % q
         return z
     
 class HonestVerifier:
-    def __init__(self, p, q, g, A):
+    def __init__(self, p, q, g, A, group=None, instrument=None):
         self.protocol = (p, q, g)
         self.public_key = A
+        self.public_key_valid = None
         self.c = None
+        self.group = group if group is not None else Group(p.bit_length(), p, g)
+        self.g_table = self.group.g_table
+        self.multi_exp = None
+        self.instrument = instrument if instrument is not None else DISABLED
 
+    @phase("challenge")
     def challenge(self, bits):
         p, _, _ = self.protocol
         self.c = random.randint(1, pow(2, bits) - 1)
         return self.c
     
+    def check_public_key(self):
+        # A never changes, so the public key tests only run once
+        if self.public_key_valid is None:
+            # test if A is an element of the order-q group (for MODP: 1 <= A <= p - 1 and A ^ q = 1 mod p)
+            self.public_key_valid = self.group.is_element(self.public_key)
+
+        return self.public_key_valid
+
+    @phase("validate")
     def validate(self, t, z):
-        # test if A is in range 1 - (p - 1)
-        p, q, g = self.protocol
-        if self.public_key < 1 or self.public_key > p - 1:
-            return False
-        
-        # test if A ^ q = 1 mod p
-        if pow(self.public_key, q, p) != 1:
+        if not self.check_public_key():
             return False
 
-        # test if t = g^z * A^c mod p
-        left = t % p
-        right = (pow(g, z, p) * pow(self.public_key, self.c, p)) % p
+        return self.verify(t, self.c, z)
+
+    def verify(self, t, c, z):
+        # test if t = g^z * A^c in the group
+        left = self.group.reduce(t)
+        right = self.equation().pow((z, c))
         return left == right
+
+    def equation(self):
+        # g^z * A^c from fixed-base tables for g and A, A's table covers the 128-bit challenges;
+        # it is built on the first verification, after that a round costs no squarings
+        if self.multi_exp is None:
+            self.multi_exp = self.group.multi_exp([self.g_table, self.group.fixed_base(self.public_key, max_bits=128)])
+        return self.multi_exp
+
+    def validate_batch(self, transcripts, security_bits=64):
+        # verify many (t, c, z) transcripts at once, returns (valid, index of the first invalid transcript)
+        if not transcripts:
+            return True, None
+
+        if not self.check_public_key():
+            return False, 0
+
+        index = self.group.batch_check(self.public_key, transcripts, self.verify, security_bits)
+        return index is None, index
     
 class SchnorrIdentificationProtocol:
-    def __init__(self, backdoor_key):
-        load_dotenv()
-        self.bit_number = int(os.getenv('BIT_NUMBER')) # type: ignore
+    def __init__(self, backdoor_key, secret_key=None, max_attempts=2, pool_size=None, instrument=None):
         self.num_rounds = 0
 
-        # load the json data
-        data = load_data('primes.json')
-        p = hex_to_int(data[f'bit_{self.bit_number}'])
-        q = (p - 1) // 2
-        g = data['generator']
+        # group (MODP or curve, see groups.default_group) and the fixed-base table for g,
+        # shared by every instance in the process
+        self.group = default_group()
+        self.bit_number = self.group.bit_number
+        p, q, g = self.group.params
+        self.g_table = self.group.g_table
 
-        x = random.randint(1, q - 1)
-        A = pow(g, x, p)
+        x = random.randint(1, q - 1) if secret_key is None else secret_key
+        A = self.g_table.pow(x)
         self.params = (p, q, g)
         self.secret_key = x
         self.public_key = A
@@ -91,63 +179,121 @@ class SchnorrIdentificationProtocol:
         self.bd_key = backdoor_key
         self.counter = 0
 
-        self.subverted_prover = SubvertedProver(p, q, g, x, A, backdoor_key, self.bit_number)
-        self.honest_verifier = HonestVerifier(p, q, g, A)
-
-    def simulate(self):
-        
-        transcripts = []
-        start_time = time.time()
+        # optional background pool of precomputed commitments
+        self.pool = CommitmentPool(p, q, g, pool_size, group=self.group) if pool_size else None
+
+        # per-phase timings of prover and verifier, off unless an enabled Instrument is passed
+        self.instrument = instrument if instrument is not None else DISABLED
+
+        self.subverted_prover = SubvertedProver(p, q, g, x, A, backdoor_key, self.bit_number, self.group, max_attempts, self.pool, self.instrument)
+        self.honest_verifier = HonestVerifier(p, q, g, A, self.group, self.instrument)
+
+    def close(self):
+        # stops the commitment pool's refill worker
+        if self.pool is not None:
+            self.pool.close()
+
+    def simulate(self, batch_size=None, rounds=None, store=None, accumulator=None, stopping=None):
+        # with a batch_size, rounds are not verified one by one but in batches of
+        # batch_size transcripts, so the recorded round time excludes validation
+        #
+        # with rounds set, exactly that many rounds are run regardless of the bit counters
+        #
+        # with a store (a TranscriptWriter), every transcript is also streamed to disk as it is produced
+        #
+        # with an accumulator (a SecretAccumulator), every round is fed to it
+        #
+        # the attack stops once the stopping policy (see stopping.py) is complete; without one it is
+        # the accumulator if it has a margin, otherwise every bit position needs 19 transcripts
+        #
+        # time_values holds the wall time of every round in seconds, from the start of the
+        # commitment to the end of validation
+        #
+        # transcripts is a TranscriptArray of fixed-width byte rows, it iterates as (t, c, z) ints
+        transcripts = TranscriptArray(self.group.byte_length)
         time_values = []
+        verified = 0
+
+        # exponentiations, PRF calls and rejections of the prover in every round
+        self.round_costs = []
+
+        x_length = self.secret_key.bit_length()
+        if stopping is None:
+            # an accumulator without a margin is never complete
+            stopping = accumulator if accumulator is not None and accumulator.margin is not None else MinCountPolicy(x_length)
+
+        while True:
+            if rounds is not None:
+                finished = len(transcripts) >= rounds
+            else:
+                finished = stopping.is_complete()
 
-        # counter for each bit poisition of the secret key
-        bit_counters = [0] * self.secret_key.bit_length()
-        transcripts_per_bit = 19
-        min_counter = 0
-        min_counter_old = 0
+            if finished:
+                break
 
-        # while min(bit_counters) < transcripts_per_bit:
-        while min_counter < transcripts_per_bit:
             self.num_rounds += 1
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
 
             t, l = self.subverted_prover.prover_commitment()
 
             challenge_bits = 128 # number of bits in the challenge
             c = self.honest_verifier.challenge(challenge_bits)
             z = self.subverted_prover.prover_response(c)
-            valid = self.honest_verifier.validate(t, z)
+            valid = self.honest_verifier.validate(t, z) if batch_size is None else True
 
-            total_time = time.time() - start_time
-            time_values.append(total_time)
+            total_time = time.perf_counter_ns() - start_time
+            time_values.append(total_time / 1e9)
+            self.instrument.record("round", total_time)
+            self.round_costs.append(self.subverted_prover.last_round)
 
-            l, b = aes_prf(self.bd_key, t, self.secret_key.bit_length(), self.bit_number // 8)
+            # the PRF is only evaluated again if the prover kept the commitment without it
+            leak = self.subverted_prover.leak
+            l, b = leak if leak is not None else aes_prf(self.bd_key, t, x_length, self.group.prf_length)
 
             if not valid:
                 print("Verification failed")
                 return
             
             transcripts.append((t, c, z))
-            bit_counters[l] += 1
-            min_counter = min(bit_counters)
-            if min_counter > min_counter_old:
-                min_counter_old = min_counter
+            if store is not None:
+                store.write(t, c, z)
+            if accumulator is not None:
+                accumulator.update(l, b)
+            if stopping is not accumulator:
+                stopping.update(l, b)
+
+            if batch_size is not None and len(transcripts) - verified >= batch_size:
+                valid, index = self.honest_verifier.validate_batch(transcripts.view(verified))
+                if not valid:
+                    print("Verification failed")
+                    return
+                verified = len(transcripts)
+
+        if batch_size is not None and len(transcripts) > verified:
+            valid, index = self.honest_verifier.validate_batch(transcripts.view(verified))
+            if not valid:
+                print("Verification failed")
+                return
 
-        print("Number of rounds: ", self.num_rounds)
+        if rounds is None:
+            print("Number of rounds: ", self.num_rounds)
         
         return transcripts, time_values
     
 def main():
     backdoor_key = os.urandom(32)  # Use a random 32-byte key as the backdoor key
 
-    protocol = SchnorrIdentificationProtocol(backdoor_key)
+    protocol = SchnorrIdentificationProtocol(backdoor_key, instrument=Instrument())
     adversary = Adversary(protocol, backdoor_key)
 
-    transcripts, time_values = protocol.simulate()
+    # the transcripts are streamed to the attack folder while the protocol runs
+    folderName = adversary.new_attack_folder()
+    with adversary.transcript_writer(folderName, protocol) as store:
+        transcripts, time_values = protocol.simulate(store=store)
 
     recovered_x = adversary.obtain_secret(transcripts)
 
-    adversary.save_attack(transcripts, protocol, time_values)
+    adversary.save_attack(None, protocol, time_values, folderName)
 
     # compare how many bits are different
     original_bits = [int(bit) for bit in bin(protocol.secret_key)[2:]]
@@ -0,0 +1,219 @@
+import os
+import struct
+import argparse
+import numpy as np
+from run_metadata import load_metadata
+
+# transcripts.bin layout: a header with the magic, the format version and the byte widths
+# of t, c and z, followed by one fixed-width big-endian row t | c | z per transcript
+MAGIC = b"ASAT"
+VERSION = 1
+HEADER = struct.Struct(">4sHHHH")
+
+class TranscriptWriter:
+    def __init__(self, path, t_width, c_width=16, z_width=None, buffer_rows=4096):
+        self.widths = (t_width, c_width, t_width if z_width is None else z_width)
+        self.buffer_rows = buffer_rows
+        self.buffer = []
+        self.count = 0
+
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, *self.widths))
+
+    def write(self, t, c, z):
+        t_width, c_width, z_width = self.widths
+        self.buffer.append(t.to_bytes(t_width, 'big') + c.to_bytes(c_width, 'big') + z.to_bytes(z_width, 'big'))
+        self.count += 1
+
+        if len(self.buffer) >= self.buffer_rows:
+            self.flush()
+
+    def write_many(self, transcripts):
+        # rows with the same layout (a TranscriptArray or a reader) are written as they are
+        if isinstance(transcripts, TranscriptRows) and transcripts.widths == self.widths:
+            self.write_rows(transcripts.rows)
+            return
+
+        for t, c, z in transcripts:
+            self.write(t, c, z)
+
+    def write_rows(self, rows):
+        # (n, t | c | z) uint8 rows in the file's layout
+        self.flush()
+        self.file.write(np.ascontiguousarray(rows).tobytes())
+        self.file.flush()
+        self.count += rows.shape[0]
+
+    def flush(self):
+        self.file.write(b"".join(self.buffer))
+        self.buffer = []
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class TranscriptRows:
+    # access to (n, t | c | z) uint8 rows in self.rows: zero-copy columns for the batch PRF,
+    # and (t, c, z) int tuples for everything that iterates or indexes the transcripts
+    def set_widths(self, widths):
+        self.widths = tuple(widths)
+        t_width, c_width, z_width = self.widths
+        self.row_width = t_width + c_width + z_width
+        self.offsets = {"t": (0, t_width), "c": (t_width, t_width + c_width), "z": (t_width + c_width, self.row_width)}
+
+    def __len__(self):
+        return self.rows.shape[0]
+
+    def column(self, name):
+        # zero-copy (n, width) uint8 view of the t, c or z column
+        start, end = self.offsets[name]
+        return self.rows[:, start:end]
+
+    def transcript(self, i):
+        row = self.rows[i].tobytes()
+        return tuple(int.from_bytes(row[start:end], 'big') for start, end in self.offsets.values())
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.transcript(j) for j in range(*i.indices(len(self)))]
+        return self.transcript(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.transcript(i)
+
+    def view(self, start, end=None):
+        # zero-copy TranscriptView of rows start .. end - 1
+        return TranscriptView(self.rows[start:end], self.widths)
+
+    def int_columns(self):
+        # (ts, cs, zs) as lists of ints, decoded column by column instead of row by row
+        columns = []
+        for name in ("t", "c", "z"):
+            start, end = self.offsets[name]
+            width = end - start
+            data = np.ascontiguousarray(self.column(name)).tobytes()
+            columns.append([int.from_bytes(data[i:i + width], 'big') for i in range(0, len(data), width)])
+        return tuple(columns)
+
+class TranscriptView(TranscriptRows):
+    # rows of another TranscriptRows (see view), e.g. the transcripts of a batch still to verify
+    def __init__(self, rows, widths):
+        self.set_widths(widths)
+        self.rows = rows
+
+class TranscriptArray(TranscriptRows):
+    # in-memory transcripts in the layout of transcripts.bin: one preallocated uint8 array of
+    # fixed-width big-endian rows that doubles its capacity when it is full, instead of a list
+    # of tuples of ints
+    def __init__(self, t_width, c_width=16, z_width=None, capacity=1024):
+        self.set_widths((t_width, c_width, t_width if z_width is None else z_width))
+        self.buffer = np.zeros((capacity, self.row_width), dtype=np.uint8)
+        self.count = 0
+
+    @property
+    def rows(self):
+        return self.buffer[:self.count]
+
+    def reserve(self, capacity):
+        if capacity > self.buffer.shape[0]:
+            buffer = np.zeros((max(capacity, 2 * self.buffer.shape[0]), self.row_width), dtype=np.uint8)
+            buffer[:self.count] = self.rows
+            self.buffer = buffer
+
+    def append(self, transcript):
+        self.reserve(self.count + 1)
+        t_width, c_width, z_width = self.widths
+        t, c, z = transcript
+        row = t.to_bytes(t_width, 'big') + c.to_bytes(c_width, 'big') + z.to_bytes(z_width, 'big')
+        self.buffer[self.count] = np.frombuffer(row, dtype=np.uint8)
+        self.count += 1
+
+    def extend(self, transcripts):
+        if isinstance(transcripts, TranscriptRows) and transcripts.widths == self.widths:
+            self.extend_rows(transcripts.rows)
+            return
+
+        for transcript in transcripts:
+            self.append(transcript)
+
+    def extend_rows(self, rows):
+        # (n, t | c | z) uint8 rows in this array's layout
+        self.reserve(self.count + rows.shape[0])
+        self.buffer[self.count:self.count + rows.shape[0]] = rows
+        self.count += rows.shape[0]
+
+    def __getstate__(self):
+        # only the used rows are pickled, e.g. when a worker process returns its transcripts
+        return {"widths": self.widths, "rows": np.ascontiguousarray(self.rows)}
+
+    def __setstate__(self, state):
+        self.set_widths(state["widths"])
+        self.buffer = state["rows"]
+        self.count = self.buffer.shape[0]
+
+class TranscriptReader(TranscriptRows):
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, *widths = HEADER.unpack(f.read(HEADER.size))
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} transcript file")
+
+        self.set_widths(widths)
+        row_width = self.row_width
+        count = (os.path.getsize(path) - HEADER.size) // row_width
+
+        # rows stay on disk and are only paged in when they are used
+        if count:
+            self.rows = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.size, shape=(count, row_width))
+        else:
+            self.rows = np.zeros((0, row_width), dtype=np.uint8)
+
+def read_text_transcripts(path):
+    # streams the (t, c, z) tuples of a legacy transcripts.txt file
+    with open(path, "r") as f:
+        for line in f:
+            t, c, z = line.strip()[1:-1].split(", ")
+            yield int(t), int(c), int(z)
+
+def convert_run(folder, remove_text=False):
+    # converts folder/transcripts.txt to folder/transcripts.bin, the widths come from the group in protocol.txt
+    text_path = folder + "/transcripts.txt"
+    if not os.path.exists(text_path):
+        return False
+
+    metadata = load_metadata(folder)
+    p, q, g = metadata.params
+    width = metadata.group.byte_length if metadata.group is not None else (p.bit_length() + 7) // 8
+
+    with TranscriptWriter(folder + "/transcripts.bin", width) as writer:
+        writer.write_many(read_text_transcripts(text_path))
+
+    if remove_text:
+        os.remove(text_path)
+
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="convert transcripts.txt of saved attacks to transcripts.bin")
+    parser.add_argument("folders", nargs="+")
+    parser.add_argument("--remove-text", action="store_true", help="delete transcripts.txt after converting")
+    args = parser.parse_args()
+
+    for folder in args.folders:
+        if convert_run(folder, args.remove_text):
+            print("converted", folder)
+        else:
+            print("no transcripts.txt in", folder)
+
+if __name__ == "__main__":
+    main()
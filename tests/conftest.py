@@ -0,0 +1,14 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture(autouse=True)
+def root_directory(monkeypatch):
+    # the protocols read primes.json (and .env) from the working directory; the tests run on the
+    # small MODP group unless they pick another one
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setenv("BIT_NUMBER", "16")
+    monkeypatch.setenv("GROUP", "modp")
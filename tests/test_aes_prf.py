@@ -0,0 +1,46 @@
+import os
+import random
+import importlib
+import numpy as np
+from benchmark import use_variant
+
+def prf_module(variant):
+    use_variant(variant)
+    return importlib.import_module("aes_prf")
+
+def test_stateless_batch_matches_scalar():
+    aes_prf = prf_module("stateless_commitment")
+    key = os.urandom(32)
+    rng = random.Random(1)
+    # 33 bytes takes the PRF over three blocks, so the hand-made CBC chaining is covered
+    for output_length in (16, 33, 192):
+        ts = [rng.getrandbits(8 * output_length) for _ in range(50)]
+        l, b = aes_prf.aes_prf_batch(key, ts, 1536, output_length)
+        assert [(int(li), int(bi)) for li, bi in zip(l, b)] == [aes_prf.aes_prf(key, t, 1536, output_length) for t in ts]
+
+def test_stateless_batch_takes_byte_rows():
+    aes_prf = prf_module("stateless_commitment")
+    key = os.urandom(32)
+    ts = [random.Random(2).getrandbits(256) for _ in range(10)]
+    rows = aes_prf.int_rows(ts, 32)
+    assert [int(l) for l in aes_prf.aes_prf_batch(key, rows, 97, 32)[0]] == [aes_prf.aes_prf(key, t, 97, 32)[0] for t in ts]
+
+def test_stateful_batch_and_cached_match_scalar():
+    aes_prf = prf_module("stateful_commitment")
+    key = os.urandom(32)
+    rng = random.Random(3)
+    for output_length in (16, 48, 192):
+        r_ts = [rng.getrandbits(8 * output_length) for _ in range(30)]
+        x_bits = [rng.getrandbits(1) for _ in r_ts]
+        expected = [aes_prf.aes_prf(key, r_t, x_bit, output_length) for r_t, x_bit in zip(r_ts, x_bits)]
+        assert list(aes_prf.aes_prf_batch(key, r_ts, x_bits, output_length)) == expected
+        assert [aes_prf.aes_prf_cached(key, r_t, x_bit, output_length) for r_t, x_bit in zip(r_ts, x_bits)] == expected
+
+def test_biased_challenge_batch_matches_scalar():
+    aes_prf = prf_module("biased_challenge")
+    key = os.urandom(32)
+    rng = random.Random(4)
+    ts = [rng.getrandbits(8 * 192) for _ in range(30)]
+    challenges = aes_prf.aes_prf_batch(key, ts, 16, 192)
+    assert isinstance(challenges, np.ndarray)
+    assert list(challenges) == [aes_prf.aes_prf(key, t, 16, 192) for t in ts]
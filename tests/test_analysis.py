@@ -0,0 +1,52 @@
+import importlib
+import numpy as np
+from benchmark import use_variant
+
+def load_analysis():
+    use_variant("stateless_commitment")
+    return importlib.import_module("analysis")
+
+def test_key_bits_are_most_significant_first():
+    analysis = load_analysis()
+    bits = analysis.key_bits([0b1011, 0b110], 4)
+    assert bits.tolist() == [[1, 0, 1, 1], [1, 1, 0, 0]]
+
+def test_false_bits_ignore_padding():
+    analysis = load_analysis()
+    counters, lengths = analysis.stack([[3, -1, 2, 1], [1, 2, -4]])
+    recovered = analysis.recovered_bits(counters)
+    errors = analysis.false_bits(recovered, [0b1011, 0b111], lengths)
+
+    assert recovered.tolist() == [[1, 0, 1, 1], [1, 1, 0, 0]]
+    assert errors.tolist() == [[False, False, False, False], [False, False, True, False]]
+
+def test_margin_histogram_counts_every_margin_of_every_run():
+    analysis = load_analysis()
+    counters, lengths = analysis.stack([[0, 2, 2, -1], [1, 0]])
+    margins, counts = analysis.margin_histogram(counters, lengths)
+
+    assert margins.tolist() == [-1, 0, 1, 2]
+    assert counts.tolist() == [[1, 1, 0, 2], [0, 1, 1, 0]]
+
+def test_low_coverage_is_fewest_first_without_padding():
+    analysis = load_analysis()
+    counters, lengths = analysis.stack([[7, 3, 9, 1, 5], [2, 8]])
+    positions, counts = analysis.low_coverage(counters, 2, lengths)
+
+    assert positions.tolist() == [[3, 1], [0, 1]]
+    assert counts.tolist() == [[1, 3], [2, 8]]
+
+def test_analyse_matches_the_adversary_for_a_single_run():
+    analysis = load_analysis()
+    adversary = importlib.import_module("adversary").Adversary.empty()
+    bit_counters = [2, -1, 0, 1, -2, 0, 3]
+    transcript_counters = [4, 5, 2, 7, 6, 2, 9]
+
+    result = analysis.analyse(bit_counters, transcript_counters, 0b1011011)
+    zero_bits, one_bits, minus_one_bits, two_bits, minus_two_bits, total = adversary.analyse_bit_counters(bit_counters, transcript_counters)
+
+    histogram = dict(zip(result["margins"].tolist(), result["histogram"][0].tolist()))
+    assert [histogram[m] for m in (0, 1, -1, 2, -2)] == [len(zero_bits), len(one_bits), len(minus_one_bits), len(two_bits), len(minus_two_bits)]
+    assert [(int(i), int(c)) for i, c in zip(result["low_coverage_positions"][0], result["low_coverage_counts"][0])] == adversary.analyse_transcript_counter(transcript_counters)
+    assert np.flatnonzero(result["errors"][0]).tolist() == [2, 5]
+    assert result["error_counts"].tolist() == [2]
@@ -0,0 +1,42 @@
+import os
+import random
+import importlib
+from math import gcd
+from benchmark import use_variant
+
+def run(rounds, seed):
+    module = use_variant("biased_challenge")
+    random.seed(seed)
+    protocol = module.SchnorrIdentificationProtocol(bytes(range(32)))
+    protocol.num_rounds = rounds
+    transcripts, time_values = protocol.simulate()
+    return protocol, importlib.import_module("adversary").Adversary(protocol, protocol.bd_key), transcripts
+
+def test_every_challenge_but_the_first_is_predicted():
+    protocol, adversary, transcripts = run(12, 1)
+
+    assert adversary.subverted_rounds(transcripts).tolist() == [False] + [True] * 11
+    assert adversary.analyse(transcripts)["subverted_rounds"] == 11
+
+    # another backdoor key predicts nothing
+    other = importlib.import_module("adversary").Adversary(protocol, os.urandom(32))
+    assert adversary.analyse(transcripts)["transcripts"] == 12
+    assert other.analyse(transcripts)["subverted_rounds"] == 0
+
+def test_solve_needs_a_reused_or_known_nonce():
+    protocol, adversary, transcripts = run(12, 2)
+
+    secret_key, report = adversary.solve(transcripts)
+    assert secret_key is None
+    assert not report["recovered"]
+
+    # with the nonce of one round known, that round gives x (its challenge has to be invertible
+    # mod q, q is not prime in the small test group)
+    p, q, g = protocol.params
+    index = next(i for i, (t, c, z) in enumerate(transcripts) if gcd(c, q) == 1)
+    r = 1234
+    t, c, z = transcripts[index]
+    transcripts[index] = (protocol.g_table.pow(r), c, (r - c * protocol.secret_key) % q)
+    secret_key, report = adversary.solve(transcripts, known_nonces={index: r})
+    assert secret_key == protocol.secret_key
+    assert report["transcripts"] == index + 1
@@ -0,0 +1,53 @@
+import os
+import random
+import importlib
+from benchmark import use_variant
+
+def saved_runs(tmp_path):
+    # a complete attack and one whose transcripts.bin has no rows but whose time.txt does
+    module = use_variant("stateless_commitment")
+    adversary = importlib.import_module("adversary").Adversary.empty()
+    random.seed(3)
+    protocol = module.SchnorrIdentificationProtocol(os.urandom(32))
+    transcripts, time_values = protocol.simulate()
+
+    full, empty = str(tmp_path / "full"), str(tmp_path / "empty")
+    os.mkdir(full)
+    os.mkdir(empty)
+    adversary.save_attack(transcripts, protocol, time_values, full)
+    adversary.save_attack([], protocol, [0.1, 0.2], empty)
+    return transcripts, full, empty
+
+def test_query_and_columns(tmp_path):
+    transcripts, full, empty = saved_runs(tmp_path)
+    catalogue_module = importlib.import_module("catalogue")
+
+    with catalogue_module.RunCatalogue(str(tmp_path / "runs.sqlite")) as catalogue:
+        assert catalogue.index_all([str(tmp_path)]) == 2
+        assert catalogue.index_all([str(tmp_path)]) == 0
+
+        runs = catalogue.query(bit_number=16)
+        assert [run["folder"] for run in runs] == [os.path.abspath(empty), os.path.abspath(full)]
+        assert catalogue.query(bit_number=1536) == []
+        assert [run["folder"] for run in catalogue.query(min_rounds=1)] == [os.path.abspath(full)]
+
+        run = runs[1]
+        assert run["rounds"] == len(transcripts)
+        assert run["bit_errors"] is not None
+        columns = catalogue.columns(run, ("t", "z"))
+        assert int.from_bytes(columns["t"][4].tobytes(), 'big') == transcripts[4][0]
+        assert int.from_bytes(columns["z"][-1].tobytes(), 'big') == transcripts[-1][2]
+
+def test_empty_run_has_no_rows(tmp_path):
+    _, _, empty = saved_runs(tmp_path)
+    catalogue_module = importlib.import_module("catalogue")
+
+    with catalogue_module.RunCatalogue(str(tmp_path / "runs.sqlite")) as catalogue:
+        catalogue.index(empty)
+        run, = catalogue.query(max_rounds=0)
+
+        assert run["bit_errors"] is None
+        assert run["time_total"] is not None
+        columns = catalogue.columns(run, ("t", "c"))
+        assert columns["t"].shape == (0, run["t_width"])
+        assert columns["c"].shape == (0, run["c_width"])
@@ -0,0 +1,69 @@
+from shared.curves import CURVES, INFINITY, Curve, CurveFixedBase, CurveMultiExp
+from shared.groups import get_curve
+
+# k * G of P-256 from the NIST point multiplication test vectors
+VECTORS = {
+    2: (0x7cf27b188d034f7e8a52380304b51ac3c08969e277f21b35a60b48fc47669978,
+        0x07775510db8ed040293d9ac69f7430dbba7dade63ce982299e04b79d227873d1),
+    3: (0x5ecbe4d1a6330a44c8f7ef951d4bf165e6c6b721efada985fb41661bc6e7fd6c,
+        0x8734640c4998ff7e374b06ce1a64a2ecd82ab036384fb83d9a79b127a27d5032),
+    112233445566778899: (0x339150844ec15234807fe862a86be77977dbfb3ae3d96f4c22795513aeaab82f,
+                         0xb1c14ddfdc8ec1b2583f51e85a5eb3a155840f2034730e9b5ada38b674336a21),
+}
+
+def p256():
+    return Curve("p256", **CURVES["p256"])
+
+def test_double_and_add_match_the_vectors():
+    curve = p256()
+    G = curve.generator
+    doubled = curve.double((G[0], G[1], 1))
+
+    assert curve.to_affine(doubled) == VECTORS[2]
+    assert curve.to_affine(curve.add_affine(doubled, G)) == VECTORS[3]
+    assert curve.normalize([doubled, curve.add_affine(doubled, G)]) == [VECTORS[2], VECTORS[3]]
+
+def test_multiply_matches_the_vectors():
+    curve = p256()
+    for k, point in VECTORS.items():
+        assert curve.on_curve(point)
+        assert curve.multiply(curve.generator, k) == point
+
+    # (n - 1) * G is -G and n * G is the point at infinity
+    gx, gy = curve.generator
+    assert curve.multiply(curve.generator, curve.n - 1) == (gx, curve.p - gy)
+    assert curve.multiply(curve.generator, curve.n) is None
+    assert curve.add_affine(INFINITY, curve.generator) == (gx, gy, 1)
+
+def test_encoding_round_trip():
+    curve = p256()
+    for point in [curve.generator] + list(VECTORS.values()):
+        encoded = curve.encode(point)
+        assert encoded >> (8 * curve.field_length) == 2 | (point[1] & 1)
+        assert curve.decode(encoded) == point
+
+    assert curve.encode(None) == 0
+    assert curve.decode(0) is None
+    assert curve.decode(4 << (8 * curve.field_length) | VECTORS[2][0]) is None
+    assert curve.decode(2 << (8 * curve.field_length) | curve.p) is None
+
+    # an x whose x^3 - 3x + b is not a square has no point
+    p = curve.p
+    x = next(x for x in range(1, 100) if pow((x ** 3 - 3 * x + curve.b) % p, (p - 1) // 2, p) != 1)
+    assert curve.decode(2 << (8 * curve.field_length) | x) is None
+
+def test_fixed_base_tables_match_multiply():
+    group = get_curve("p256")
+    curve = group.curve
+    for k, point in VECTORS.items():
+        assert group.g_table.pow(k) == curve.encode(point)
+    assert group.g_table.pow(group.q) == 0
+
+    # a small table falls back to multiply for longer exponents
+    small = CurveFixedBase(curve, group.g, max_bits=16)
+    assert small.pow(3) == curve.encode(VECTORS[3])
+    assert small.pow(112233445566778899) == curve.encode(VECTORS[112233445566778899])
+
+    A = curve.encode(VECTORS[3])
+    multi_exp = CurveMultiExp([group.g_table, group.fixed_base(A)])
+    assert multi_exp.pow([5, 7]) == group.g_table.pow(5 + 3 * 7)
@@ -0,0 +1,20 @@
+from shared.instrumentation import DISABLED, Instrument, phase
+
+class Prover:
+    def __init__(self, instrument):
+        self.instrument = instrument
+
+    @phase("response")
+    def prover_response(self, c, scale=1):
+        "docstring of the method"
+        return c * scale
+
+def test_phase_passes_keyword_arguments():
+    instrument = Instrument()
+    prover = Prover(instrument)
+
+    assert prover.prover_response(3, scale=2) == 6
+    assert Prover(DISABLED).prover_response(c=4) == 4
+    assert len(instrument.durations["response"]) == 1
+    assert Prover.prover_response.__name__ == "prover_response"
+    assert Prover.prover_response.__doc__ == "docstring of the method"
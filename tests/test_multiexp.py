@@ -0,0 +1,37 @@
+import random
+from shared.groups import get_group
+
+def transcripts(group, x, n):
+    p, q, g = group.params
+    result = []
+    for _ in range(n):
+        r = random.randint(1, q - 1)
+        c = random.randint(1, pow(2, 128) - 1)
+        result.append((group.g_table.pow(r), c, (r - c * x) % q))
+    return result
+
+def check(group, A):
+    p, q, g = group.params
+    return lambda t, c, z: t % p == group.g_table.pow(z) * pow(A, c, p) % p
+
+def test_batch_check_accepts_valid_transcripts():
+    group = get_group(1536)
+    x = random.randint(1, group.q - 1)
+    A = group.g_table.pow(x)
+    assert group.batch_check(A, transcripts(group, x, 16), check(group, A)) is None
+
+def test_batch_check_reports_the_first_invalid_transcript():
+    group = get_group(1536)
+    p, q, g = group.params
+    x = random.randint(1, q - 1)
+    A = group.g_table.pow(x)
+    batch = transcripts(group, x, 8)
+
+    # a wrong response with a commitment in the subgroup at 2, a commitment outside it at 5
+    t, c, z = batch[2]
+    batch[2] = (t, c, (z + 1) % q)
+    t, c, z = batch[5]
+    batch[5] = (p - t, c, z)
+
+    assert group.batch_check(A, batch, check(group, A)) == 2
+    assert group.batch_check(A, batch[3:], check(group, A)) == 2
@@ -0,0 +1,62 @@
+import os
+import importlib
+from benchmark import use_variant
+from shared.groups import default_group
+
+def generator(checkpoint_every=None, seed=7):
+    use_variant("stateful_commitment")
+    NonceGenerator = importlib.import_module("nonce_generator").NonceGenerator
+    x_bits = [int(bit) for bit in bin(1234)[2:]]
+    return NonceGenerator(default_group(), b"k" * 32, x_bits, seed, checkpoint_every)
+
+def test_restore_replays_the_chain_from_a_checkpoint():
+    nonces = generator()
+    for _ in range(5):
+        nonces.next()
+    state = nonces.checkpoint()
+    tail = [nonces.next() for _ in range(10)]
+
+    nonces.restore(state)
+    assert [nonces.next() for _ in range(10)] == tail
+
+def test_seek_matches_a_straight_run():
+    straight = generator()
+    reference = [straight.next() for _ in range(20)]
+
+    nonces = generator(checkpoint_every=4)
+    for _ in range(20):
+        nonces.next()
+    assert sorted(nonces.checkpoints) == [0, 4, 8, 12, 16, 20]
+
+    # back to a checkpoint, back between two checkpoints and forward again
+    for n in (8, 3, 13, 19, 0):
+        nonces.seek(n)
+        assert nonces.round == n
+        assert nonces.next() == reference[n]
+
+def test_seek_back_without_checkpoints_is_an_error():
+    nonces = generator()
+    for _ in range(3):
+        nonces.next()
+
+    try:
+        nonces.seek(1)
+    except ValueError:
+        pass
+    else:
+        assert False, "seeked back without a checkpoint"
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "chain.json")
+    nonces = generator(checkpoint_every=4)
+    for _ in range(6):
+        nonces.next()
+    nonces.save(path)
+    tail = [nonces.next() for _ in range(6)]
+
+    loaded = generator(checkpoint_every=4, seed=99)
+    loaded.load(path)
+    assert loaded.round == 6
+    assert sorted(loaded.checkpoints) == [0, 4]
+    assert [loaded.next() for _ in range(6)] == tail
+    assert not os.path.exists(path + ".tmp")
@@ -0,0 +1,82 @@
+import os
+import importlib
+import pytest
+from benchmark import use_variant
+
+def metadata_module():
+    use_variant("stateless_commitment")
+    return importlib.import_module("run_metadata")
+
+def saved_lines(tmp_path):
+    # protocol.txt of a 16 bit MODP run, as lines
+    module = use_variant("stateless_commitment")
+    run_metadata = importlib.import_module("run_metadata")
+    run_metadata.save_metadata(str(tmp_path), module.SchnorrIdentificationProtocol(os.urandom(32)))
+    return (tmp_path / "protocol.txt").read_text().splitlines(keepends=True)
+
+def write_lines(tmp_path, lines):
+    (tmp_path / "protocol.txt").write_text("".join(lines))
+
+def replace(lines, key, value):
+    return [f"{key},{value}\n" if line.startswith(key + ",") else line for line in lines]
+
+def test_saved_metadata_loads_back(tmp_path):
+    lines = saved_lines(tmp_path)
+    run_metadata = metadata_module()
+    metadata = run_metadata.load_metadata(str(tmp_path), check_key=True)
+
+    assert metadata.version == run_metadata.VERSION
+    assert metadata.group is not None
+    assert metadata.params == metadata.group.params
+    assert metadata.lines() == lines
+
+def test_version_1_files_have_no_version_line():
+    run_metadata = metadata_module()
+    version, fields = run_metadata.parse_fields([f"{key},1\n" for key in run_metadata.FIELDS])
+    assert version == 1
+    assert set(fields) == set(run_metadata.FIELDS)
+
+@pytest.mark.parametrize("lines, message", [
+    (["bit_number,16\n", "p 23\n"], "unexpected line"),
+    (["bit_number,16\n", "colour,red\n"], "unexpected line"),
+    (["bit_number,16\n", "bit_number,16\n"], "bit_number given twice"),
+    (["bit_number,16\n", "p,23\n"], "missing q, g, x, y, bd_key"),
+])
+def test_parse_fields_errors(lines, message):
+    run_metadata = metadata_module()
+    with pytest.raises(ValueError, match=message):
+        run_metadata.parse_fields(lines)
+
+def test_newer_versions_are_rejected():
+    run_metadata = metadata_module()
+    lines = [f"version,{run_metadata.VERSION + 1}\n"] + [f"{key},1\n" for key in run_metadata.FIELDS]
+    with pytest.raises(ValueError, match="newer"):
+        run_metadata.parse_fields(lines)
+
+def test_load_metadata_errors(tmp_path):
+    lines = saved_lines(tmp_path)
+    run_metadata = metadata_module()
+    folder = str(tmp_path)
+
+    # p, q, g that differ from the registry group of bit_number
+    write_lines(tmp_path, replace(lines, "g", 3))
+    with pytest.raises(ValueError, match="differ from the modp group of 16 bits"):
+        run_metadata.load_metadata(folder)
+
+    write_lines(tmp_path, replace(lines, "group", "p999"))
+    with pytest.raises(ValueError, match="unknown group p999"):
+        run_metadata.load_metadata(folder)
+
+    # without a registry group (no 24 bit prime in primes.json) q must be (p - 1) / 2
+    unregistered = replace(replace(replace(replace(lines, "bit_number", 24), "p", 23), "q", 5), "g", 4)
+    write_lines(tmp_path, unregistered)
+    with pytest.raises(ValueError, match=r"q is not \(p - 1\) / 2"):
+        run_metadata.load_metadata(folder)
+
+    write_lines(tmp_path, replace(unregistered, "q", 11))
+    assert run_metadata.load_metadata(folder).params == (23, 11, 4)
+
+    write_lines(tmp_path, replace(lines, "y", 1))
+    run_metadata.load_metadata(folder)
+    with pytest.raises(ValueError, match="y is not g"):
+        run_metadata.load_metadata(folder, check_key=True)
@@ -0,0 +1,6 @@
+from itertools import islice
+from shared.seeds import instance_seeds, seed_stream
+
+def test_seed_stream_gives_the_instance_seeds():
+    assert list(islice(seed_stream(42), 5)) == instance_seeds(42, 5)
+    assert instance_seeds(42, 3) == instance_seeds(42, 5)[:3]
@@ -0,0 +1,68 @@
+import os
+import random
+import importlib
+from benchmark import use_variant
+
+def scheme_of(variant):
+    use_variant(variant)
+    signature = importlib.import_module("signature")
+    if variant == "schnorr":
+        return signature.SchnorrSignatureScheme()
+    return signature.SubvertedSignatureScheme(bytes(range(32)))
+
+def test_signatures_round_trip():
+    for variant in ("schnorr", "stateless_commitment", "stateful_commitment"):
+        scheme = scheme_of(variant)
+        messages = [f"message {i}".encode() for i in range(8)]
+        signatures = scheme.signer.sign_batch(messages)
+        scheme.close()
+
+        assert all(scheme.verifier.verify(message, signature) for message, signature in zip(messages, signatures))
+        assert scheme.verifier.verify_batch(messages, signatures) == (True, None)
+        assert not scheme.verifier.verify(b"another message", signatures[0])
+
+def test_verify_batch_reports_the_failing_signature():
+    for variant in ("schnorr", "stateless_commitment", "stateful_commitment"):
+        scheme = scheme_of(variant)
+        messages = [f"message {i}".encode() for i in range(8)]
+        signatures = scheme.signer.sign_batch(messages)
+        scheme.close()
+
+        t, z = signatures[5]
+        signatures[5] = (t, (z + 1) % scheme.group.q)
+        assert scheme.verifier.verify_batch(messages, signatures) == (False, 5)
+
+def test_stateless_signatures_leak_the_key():
+    use_variant("stateless_commitment")
+    signature = importlib.import_module("signature")
+    adversary_module = importlib.import_module("adversary")
+    random.seed(4)
+    scheme = signature.SubvertedSignatureScheme(bytes(range(32)))
+    accumulator = adversary_module.Adversary(scheme.protocol, scheme.bd_key).accumulator(5)
+
+    signed = 0
+    while not accumulator.is_complete():
+        messages = [f"message {signed + i}".encode() for i in range(64)]
+        accumulator.add_chunk(scheme.verifier.transcripts(messages, scheme.signer.sign_batch(messages)))
+        signed += len(messages)
+    scheme.close()
+
+    recovered = int("".join(str(bit) for bit in accumulator.recovered_key()), 2)
+    assert recovered == scheme.secret_key
+
+def test_stateful_signatures_leak_the_key():
+    use_variant("stateful_commitment")
+    signature = importlib.import_module("signature")
+    adversary_module = importlib.import_module("adversary")
+    random.seed(4)
+    scheme = signature.SubvertedSignatureScheme(bytes(range(32)), seed=4)
+    messages = [f"message {i}".encode() for i in range(scheme.protocol.num_rounds)]
+    signatures = scheme.signer.sign_batch(messages)
+    scheme.close()
+
+    recovered = adversary_module.Adversary(scheme.protocol, scheme.bd_key).obtain_secret(scheme.verifier.transcripts(messages, signatures), workers=1)
+
+    # the chain starts at the second bit of x, so the last recovered bit is the first one
+    recovered = recovered[:scheme.secret_key.bit_length()]
+    recovered = recovered[-1:] + recovered[:-1]
+    assert int("".join(str(bit) for bit in recovered), 2) == scheme.secret_key
@@ -0,0 +1,54 @@
+import os
+import random
+import importlib
+from benchmark import use_variant
+
+def recovered_key(adversary, transcripts, secret_key):
+    # the chain starts at the second bit of x, so the last recovered bit is the first one
+    bits = adversary.obtain_secret(transcripts, workers=1)[:secret_key.bit_length()]
+    bits = bits[-1:] + bits[:-1]
+    return int("".join(str(bit) for bit in bits), 2)
+
+def test_simulate_after_precompute_runs_the_whole_chain():
+    module = use_variant("stateful_commitment")
+    random.seed(3)
+    protocol = module.SchnorrIdentificationProtocol(os.urandom(32))
+    protocol.subverted_prover.precompute(protocol.num_rounds + 3)
+
+    transcripts, time_values = protocol.simulate()
+
+    assert len(transcripts) == protocol.num_rounds
+    adversary = importlib.import_module("adversary").Adversary(protocol, protocol.bd_key)
+    assert recovered_key(adversary, transcripts, protocol.secret_key) == protocol.secret_key
+
+def test_checkpoint_with_precomputed_pairs_resumes_at_the_next_round(tmp_path):
+    module = use_variant("stateful_commitment")
+    backdoor_key = os.urandom(32)
+    path = str(tmp_path / "chain.json")
+
+    reference, _ = module.SchnorrIdentificationProtocol(backdoor_key, 1234, seed=7).simulate()
+
+    # the chain runs 4 rounds ahead of the prover when the checkpoint of round 8 is saved
+    first = module.SchnorrIdentificationProtocol(backdoor_key, 1234, seed=7, checkpoint_every=4)
+    first.subverted_prover.precompute(12)
+    head, _ = first.simulate(stop=8, checkpoint_path=path)
+
+    second = module.SchnorrIdentificationProtocol(backdoor_key, 1234, seed=7, checkpoint_every=4)
+    tail, _ = second.simulate(checkpoint_path=path)
+
+    assert [t for t, c, z in head + tail] == [t for t, c, z in reference]
+
+def test_background_pool_follows_the_chain():
+    module = use_variant("stateful_commitment")
+    backdoor_key = os.urandom(32)
+
+    reference, _ = module.SchnorrIdentificationProtocol(backdoor_key, 1234, seed=7).simulate()
+
+    # the pool runs the chain ahead of the rounds, seeking back drops what it queued
+    protocol = module.SchnorrIdentificationProtocol(backdoor_key, 1234, seed=7, checkpoint_every=4, pool_size=8)
+    head, _ = protocol.simulate(stop=6)
+    tail, _ = protocol.simulate(start=4)
+    protocol.close()
+
+    assert [t for t, c, z in head] == [t for t, c, z in reference[:6]]
+    assert [t for t, c, z in tail] == [t for t, c, z in reference[4:]]
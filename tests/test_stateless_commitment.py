@@ -0,0 +1,47 @@
+import os
+import random
+import importlib
+from benchmark import use_variant
+
+def test_simulate_with_an_accumulator_without_margin_stops():
+    module = use_variant("stateless_commitment")
+    random.seed(6)
+    protocol = module.SchnorrIdentificationProtocol(os.urandom(32))
+    adversary = importlib.import_module("adversary").Adversary(protocol, protocol.bd_key)
+
+    # without a margin the accumulator is not a stopping rule, the 19 transcripts per bit are
+    accumulator = adversary.accumulator()
+    transcripts, time_values = protocol.simulate(accumulator=accumulator)
+
+    assert accumulator.num_transcripts == len(transcripts)
+    assert min(accumulator.transcript_counters) == 19
+
+def test_confidence_policy_settles_like_an_accumulator_with_its_margin():
+    use_variant("stateless_commitment")
+    stopping = importlib.import_module("stopping")
+    adversary = importlib.import_module("adversary")
+
+    policy = stopping.ConfidencePolicy(4, 0.01)
+    accumulator = adversary.SecretAccumulator(None, 4, None, stopping.margin_for(0.01))
+    rng = random.Random(5)
+    while not accumulator.is_complete():
+        l, b = rng.randrange(4), rng.random() < 0.75
+        policy.update(l, b)
+        accumulator.update(l, b)
+        assert policy.is_complete() == accumulator.is_complete()
+
+    assert policy.margin == 5
+    assert policy.recovered_key() == accumulator.recovered_key()
+
+def test_accumulator_confidence_is_the_analysis_one():
+    use_variant("stateless_commitment")
+    stopping = importlib.import_module("stopping")
+    analysis = importlib.import_module("analysis")
+
+    policy = stopping.ConfidencePolicy(3, 0.01)
+    for l, b in [(0, 1), (0, 1), (1, 0), (2, 1), (2, 0)]:
+        policy.update(l, b)
+
+    expected = [1 / (1 + (1 / 3) ** 2), 0.75, 0.5]
+    assert policy.confidence().tolist() == expected
+    assert analysis.analyse(policy.bit_counters, policy.transcript_counters)["confidence"][0].tolist() == expected
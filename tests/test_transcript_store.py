@@ -0,0 +1,110 @@
+import os
+import random
+import importlib
+from benchmark import use_variant
+
+def store_module():
+    use_variant("stateless_commitment")
+    return importlib.import_module("transcript_store")
+
+def random_transcripts(n, width, seed=0):
+    rng = random.Random(seed)
+    return [(rng.getrandbits(8 * width), rng.getrandbits(128), rng.getrandbits(8 * width)) for _ in range(n)]
+
+def test_write_and_read_back(tmp_path):
+    store = store_module()
+    path = str(tmp_path / "transcripts.bin")
+    transcripts = random_transcripts(10, 24)
+
+    # a buffer smaller than the run, so rows are flushed while writing
+    with store.TranscriptWriter(path, 24, buffer_rows=3) as writer:
+        writer.write_many(transcripts)
+
+    reader = store.TranscriptReader(path)
+    assert reader.widths == (24, 16, 24)
+    assert len(reader) == 10
+    assert list(reader) == transcripts
+    assert reader[2:5] == transcripts[2:5]
+    assert int.from_bytes(reader.column("c")[7].tobytes(), 'big') == transcripts[7][1]
+
+def test_rows_of_an_array_are_written_as_they_are(tmp_path):
+    store = store_module()
+    path = str(tmp_path / "transcripts.bin")
+    array = store.TranscriptArray(8, capacity=2)
+    array.extend(random_transcripts(5, 8, seed=1))
+
+    with store.TranscriptWriter(path, 8) as writer:
+        writer.write_many(array)
+
+    assert list(store.TranscriptReader(path)) == list(array)
+
+def test_empty_file_reads_as_no_transcripts(tmp_path):
+    store = store_module()
+    path = str(tmp_path / "transcripts.bin")
+    store.TranscriptWriter(path, 8).close()
+
+    reader = store.TranscriptReader(path)
+    assert len(reader) == 0
+    assert list(reader) == []
+
+def test_other_files_are_rejected(tmp_path):
+    store = store_module()
+    path = tmp_path / "transcripts.bin"
+    path.write_bytes(b"(1, 2, 3)\n" * 4)
+
+    try:
+        store.TranscriptReader(str(path))
+    except ValueError:
+        pass
+    else:
+        assert False, "a text file was read as transcripts"
+
+def test_convert_run_round_trip(tmp_path):
+    module = use_variant("stateless_commitment")
+    store = importlib.import_module("transcript_store")
+    run_metadata = importlib.import_module("run_metadata")
+    folder = str(tmp_path)
+
+    random.seed(5)
+    protocol = module.SchnorrIdentificationProtocol(os.urandom(32))
+    transcripts, time_values = protocol.simulate(rounds=20)
+    run_metadata.save_metadata(folder, protocol)
+    with open(folder + "/transcripts.txt", "w") as f:
+        for transcript in transcripts:
+            f.write(str(tuple(transcript)) + "\n")
+
+    assert store.convert_run(folder, remove_text=True)
+    assert not os.path.exists(folder + "/transcripts.txt")
+    assert list(store.TranscriptReader(folder + "/transcripts.bin")) == [tuple(transcript) for transcript in transcripts]
+
+    # nothing left to convert
+    assert not store.convert_run(folder)
+
+def test_views_and_columns_share_the_rows():
+    store = store_module()
+    transcripts = random_transcripts(6, 8, seed=2)
+    array = store.TranscriptArray(8)
+    array.extend(transcripts)
+
+    view = array.view(2)
+    assert len(view) == 4
+    assert list(view) == transcripts[2:]
+    assert view.rows.base is array.rows.base
+    assert view.int_columns() == tuple(list(column) for column in zip(*transcripts[2:]))
+    assert array.view(6).int_columns() == ([], [], [])
+
+def test_batch_check_reads_the_columns_of_a_view():
+    module = use_variant("stateless_commitment")
+    store = importlib.import_module("transcript_store")
+    random.seed(9)
+    protocol = module.SchnorrIdentificationProtocol(os.urandom(32))
+    transcripts, time_values = protocol.simulate(batch_size=8, rounds=20)
+    verifier = protocol.honest_verifier
+
+    assert verifier.validate_batch(transcripts.view(4)) == (True, None)
+
+    # z of transcript 13 is off by one, which is transcript 9 of the view
+    t, c, z = transcripts[13]
+    broken = store.TranscriptArray(transcripts.widths[0])
+    broken.extend(transcripts[:13] + [(t, c, (z + 1) % protocol.params[1])] + transcripts[14:])
+    assert verifier.validate_batch(broken.view(4)) == (False, 9)
@@ -0,0 +1,40 @@
+import os
+import asyncio
+import importlib
+from benchmark import use_variant
+from shared import transport
+
+def test_malformed_frame_only_ends_its_own_session():
+    module = use_variant("schnorr")
+    endpoints = importlib.import_module("transport").endpoints
+    protocol = module.SchnorrIdentificationProtocol3()
+    new_prover, new_verifier = endpoints(protocol)
+
+    async def run():
+        # the malformed frame is rejected before anything runs on the executor
+        server = transport.VerifierServer(new_verifier, None)
+        listener = await server.start(("127.0.0.1", 0))
+        address = listener.sockets[0].getsockname()[:2]
+
+        reader, writer = await transport.open_connection(address)
+        writer.write(b"X\x00\x01\x00")
+        await writer.drain()
+        closed = await reader.read() == b""
+        writer.close()
+
+        await server.close()
+        return closed, server
+
+    closed, server = asyncio.run(run())
+    assert closed
+    assert (server.rounds, server.failures) == (1, 1)
+
+def test_sessions_of_every_variant_are_valid():
+    for name, arguments in (("schnorr", ()), ("biased_challenge", (os.urandom(32),))):
+        module = use_variant(name)
+        _, protocol_class, _, _ = importlib.import_module("benchmark").VARIANTS[name]
+        protocol = getattr(module, protocol_class)(*arguments)
+
+        results = asyncio.run(importlib.import_module("transport").run_load(protocol, sessions=4, rounds=3, workers=1))
+        assert results["rounds"] == 12
+        assert results["failed_sessions"] == 0